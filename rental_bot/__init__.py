@@ -8,8 +8,15 @@ from .scrapers import (
     Wonen123Scraper,
     Zig365Scraper,
 )
+from .listing import Listing, listing_fingerprint, parse_price
 from .storage import ListingStorage
 from .notification import NotificationSystem
+from .enrichment import DetailEnricher
+from .coordination import LeaseTable
+from .scheduling import Deadline, DeadlineExceeded, SourceStats
+from .session import SessionStore
+from .feed import ListingFeed
+from .api import ListingIndex, serve_api
 from .bot import MultiRentalBot, run_bot
 from .config import (
     logger,
@@ -17,8 +24,10 @@ from .config import (
     TELEGRAM_CHAT_ID,
     CITY,
     LOCATIONS,
+    LOCATION_RADIUS_KM,
     PRICE_RANGE,
     PRICE_MAX,
+    PARSE_WORKERS,
 )
 
 __all__ = [
@@ -29,8 +38,20 @@ __all__ = [
     "NederwoonScraper",
     "Wonen123Scraper",
     "Zig365Scraper",
+    "Listing",
+    "parse_price",
+    "listing_fingerprint",
     "ListingStorage",
     "NotificationSystem",
+    "DetailEnricher",
+    "LeaseTable",
+    "Deadline",
+    "DeadlineExceeded",
+    "SourceStats",
+    "SessionStore",
+    "ListingFeed",
+    "ListingIndex",
+    "serve_api",
     "MultiRentalBot",
     "run_bot",
     "logger",
@@ -38,6 +59,8 @@ __all__ = [
     "TELEGRAM_CHAT_ID",
     "CITY",
     "LOCATIONS",
+    "LOCATION_RADIUS_KM",
     "PRICE_RANGE",
     "PRICE_MAX",
+    "PARSE_WORKERS",
 ]
@@ -0,0 +1,217 @@
+"""Small local HTTP API over recent listings.
+
+The bot itself runs once per cron tick, so the API is a separate long-running
+process that tails the NDJSON feed (see `feed.ListingFeed`) into an in-memory
+`ListingIndex`. Every change gets a monotonically increasing cursor; clients
+pass the last cursor they saw as ``since`` and only receive what changed after
+it. Run with ``python -m rental_bot.api``.
+
+    GET /listings?since=0&town=Epe&source=Pararius&min_price=500&max_price=1200&limit=100
+    GET /health
+"""
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .config import API_HOST, API_PORT, FEED_FILE, logger
+from .feed import rotated_segments
+from .location import address_matches
+
+
+class ListingIndex:
+    """Latest record per listing ID, ordered by the cursor of its last change."""
+
+    def __init__(self):
+        self.cursor = 0
+        # id -> (cursor, record); an update moves the entry to the end, so the
+        # newest changes are always at the tail.
+        self._records: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def upsert(self, record: Dict) -> int:
+        with self._lock:
+            self.cursor += 1
+            self._records[record["id"]] = (self.cursor, record)
+            self._records.move_to_end(record["id"])
+            return self.cursor
+
+    def query(
+        self,
+        since: int = 0,
+        town: Optional[str] = None,
+        source: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = 100,
+    ) -> Tuple[int, List[Dict]]:
+        """Listings changed after `since`, oldest change first.
+
+        Returns the cursor to pass as the next `since`: the last returned
+        change, or the current cursor when nothing matched.
+        """
+        with self._lock:
+            changed = []
+            # Walk back from the newest change; stop at the first one the
+            # client has already seen.
+            for cursor, record in reversed(self._records.values()):
+                if cursor <= since:
+                    break
+                changed.append((cursor, record))
+            next_cursor = self.cursor
+        changed.reverse()
+        results = []
+        for cursor, record in changed:
+            if source and record.get("source", "").lower() != source.lower():
+                continue
+            price = record.get("price_value")
+            if min_price is not None and (price is None or price < min_price):
+                continue
+            if max_price is not None and (price is None or price > max_price):
+                continue
+            if town and not address_matches(f"{record.get('address', '')} {record.get('title', '')}", town):
+                continue
+            results.append(dict(record, cursor=cursor))
+            if len(results) >= limit:
+                next_cursor = cursor
+                break
+        return next_cursor, results
+
+
+class FeedTailer:
+    """Feeds NDJSON feed lines into a `ListingIndex`, following rotations."""
+
+    def __init__(self, path: str, index: ListingIndex):
+        self.path = path
+        self.index = index
+        self._file = None
+        self._inode = None
+        self._lock = threading.Lock()
+
+    def load_history(self) -> None:
+        """Replay rotated segments (oldest first) before the live file."""
+        for segment in rotated_segments(self.path):
+            opener = gzip.open if segment.endswith(".gz") else open
+            with opener(segment, "rt", encoding="utf-8") as f:
+                self._consume(f)
+        self.poll()
+
+    def poll(self) -> None:
+        """Read lines appended since the last poll."""
+        with self._lock:
+            if self._file is not None and self._rotated():
+                # Drain what was written before the rename, then switch files.
+                self._consume(self._file)
+                self._file.close()
+                self._file = None
+            if self._file is None:
+                if not os.path.exists(self.path):
+                    return
+                self._file = open(self.path, "r", encoding="utf-8")
+                self._inode = os.fstat(self._file.fileno()).st_ino
+            self._consume(self._file)
+
+    def _rotated(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def _consume(self, f) -> None:
+        while True:
+            position = f.tell() if f.seekable() else None
+            line = f.readline()
+            if not line:
+                return
+            if not line.endswith("\n"):
+                # Partially written line: re-read it on the next poll.
+                if position is not None:
+                    f.seek(position)
+                return
+            try:
+                self.index.upsert(json.loads(line))
+            except (ValueError, KeyError) as exc:
+                logger.warning(f"Skipping bad feed line: {exc}")
+
+
+class ListingRequestHandler(BaseHTTPRequestHandler):
+    index: ListingIndex
+    tailer: Optional[FeedTailer] = None
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send(200, {"status": "ok", "listings": len(self.index), "cursor": self.index.cursor})
+            return
+        if url.path != "/listings":
+            self._send(404, {"error": "not found"})
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            since = int(params.get("since", 0))
+            limit = min(int(params.get("limit", 100)), 1000)
+            min_price = float(params["min_price"]) if "min_price" in params else None
+            max_price = float(params["max_price"]) if "max_price" in params else None
+        except ValueError as exc:
+            self._send(400, {"error": f"bad parameter: {exc}"})
+            return
+        if self.tailer is not None:
+            self.tailer.poll()
+        cursor, listings = self.index.query(
+            since=since,
+            town=params.get("town"),
+            source=params.get("source"),
+            min_price=min_price,
+            max_price=max_price,
+            limit=limit,
+        )
+        self._send(200, {"cursor": cursor, "listings": listings})
+
+    def _send(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info(f"API {self.address_string()} {format % args}")
+
+
+def make_server(
+    index: ListingIndex,
+    tailer: Optional[FeedTailer] = None,
+    host: str = API_HOST,
+    port: int = API_PORT,
+) -> ThreadingHTTPServer:
+    handler = type("Handler", (ListingRequestHandler,), {"index": index, "tailer": tailer})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_api(feed_file: str = FEED_FILE, host: str = API_HOST, port: int = API_PORT) -> None:
+    """Load the feed history and serve it until interrupted."""
+    if not feed_file:
+        raise SystemExit("Set FEED_FILE so the bot writes a feed for the API to serve")
+    index = ListingIndex()
+    tailer = FeedTailer(feed_file, index)
+    tailer.load_history()
+    logger.info(f"Serving {len(index)} listings on http://{host}:{port}")
+    server = make_server(index, tailer, host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:  # pragma: no cover - manual stop
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve_api()
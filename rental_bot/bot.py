@@ -1,16 +1,45 @@
 """Main bot orchestration."""
-from typing import List
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 from urllib.parse import quote_plus
 
 from .config import (
+    DETAIL_CACHE_FILE,
+    DETAIL_WORKERS_PER_HOST,
+    ENRICH_DETAILS,
+    FEED_FILE,
+    FEED_GZIP,
+    FEED_MAX_BYTES,
+    FEED_ROTATE_SECONDS,
+    LEASE_DB,
+    LEASE_TTL,
+    LOCATION_RADIUS_KM,
     LOCATIONS,
+    MAX_PAGES,
+    PARSE_WORKERS,
     PRICE_MAX,
     PRICE_RANGE,
+    RELIST_AFTER_RUNS,
+    RUN_BUDGET,
+    SESSION_STATE_FILE,
+    SOURCE_STATS_FILE,
     TELEGRAM_CHAT_ID,
     TELEGRAM_TOKEN,
+    WORKER_ID,
+    WORKER_TTL,
     logger,
 )
+from .coordination import LeaseTable
+from .enrichment import DetailEnricher
+from .feed import ListingFeed
+from .listing import Listing
+from .location import unknown_towns
 from .notification import NotificationSystem
+from .scheduling import Deadline, SourceStats
+from .session import SessionStore
 from .scrapers import (
     BaseScraper,
     ParariusScraper,
@@ -19,30 +48,255 @@ from .scrapers import (
     Wonen123Scraper,
     Zig365Scraper,
 )
-from .storage import ListingStorage
+from .storage import CHANGED, NEW, RELISTED, ListingStorage, vanished
 
 
 class MultiRentalBot:
-    def __init__(self, scrapers: List[BaseScraper]):
+    def __init__(
+        self,
+        scrapers: List[BaseScraper],
+        parse_workers: int = PARSE_WORKERS,
+        leases: Optional[LeaseTable] = None,
+        deadline: Optional[Deadline] = None,
+        stats: Optional[SourceStats] = None,
+        session_store: Optional[SessionStore] = None,
+        feed: Optional[ListingFeed] = None,
+    ):
         self.scrapers = scrapers
-        self.storage = ListingStorage()
+        self.parse_workers = parse_workers
+        self.leases = leases
+        self.deadline = deadline
+        self.stats = stats
+        self.session_store = session_store
+        self.feed = feed
+        for scraper in scrapers:
+            scraper.deadline = deadline
+            scraper.session_store = session_store
+        self.storage = ListingStorage(relist_after=RELIST_AFTER_RUNS)
+        # Number of page-1 listings at the head of each scraper's batch; only
+        # those go into the first-page snapshots used to spot offline listings.
+        self.first_page_sizes: Dict[str, int] = {}
         self.notifier = NotificationSystem(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+        self.enricher = (
+            DetailEnricher(DETAIL_CACHE_FILE, DETAIL_WORKERS_PER_HOST, deadline)
+            if ENRICH_DETAILS
+            else None
+        )
+
+    def collect_listings(self) -> List[Listing]:
+        """Fetch and parse every scraper, returning all listings."""
+        return [listing for _, listings in self.iter_batches() for listing in listings]
+
+    def iter_batches(self) -> Iterator[Tuple[BaseScraper, List[Listing]]]:
+        """Yield one batch of listings per active scraper as soon as it is done.
+
+        With more than one parse worker the run is pipelined: a fetch thread
+        hands raw bodies to a process pool as they arrive, so parsing page N
+        overlaps with fetching page N+1, and each parse is yielded the moment
+        it finishes, so a fast source is never held back by a slow fetch of
+        the next one.
+        """
+        if self.parse_workers <= 1:
+            for scraper, page in self._fetch_pages():
+                yield scraper, self._crawl_more(scraper, scraper.parse_page(page), scraper.parse_page)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            # Parse futures in the order they finish, then None once the fetch
+            # thread is done submitting.
+            finished: "queue.Queue[Optional[Tuple[BaseScraper, Future]]]" = queue.Queue()
+            submitted: List[Future] = []
+            stop = threading.Event()
+            errors: List[BaseException] = []
+
+            def fetch() -> None:
+                try:
+                    for scraper, page in self._fetch_pages():
+                        future = pool.submit(scraper.parse_page, page)
+                        submitted.append(future)
+                        future.add_done_callback(lambda future, scraper=scraper: finished.put((scraper, future)))
+                        if stop.is_set():
+                            break
+                except BaseException as exc:
+                    errors.append(exc)
+                finally:
+                    finished.put(None)
+
+            fetcher = threading.Thread(target=fetch, name="fetch", daemon=True)
+            fetcher.start()
+            try:
+                received = 0
+                fetching = True
+                while fetching or received < len(submitted):
+                    entry = finished.get()
+                    if entry is None:
+                        fetching = False
+                        continue
+                    received += 1
+                    batch = self._parsed_batch(pool, *entry)
+                    if batch is not None:
+                        yield batch
+            finally:
+                # Also reached when the consumer stops early: let the fetch
+                # thread finish its current fetch and exit.
+                stop.set()
+                fetcher.join()
+            if errors:
+                raise errors[0]
+
+    def _parsed_batch(
+        self, pool: ProcessPoolExecutor, scraper: BaseScraper, future: Future
+    ) -> Optional[Tuple[BaseScraper, List[Listing]]]:
+        """The scraper's listings from a finished parse, with any further pages."""
+        try:
+            # Follow-up pages are rare (only when page 1 had unseen listings),
+            # so they are fetched and parsed synchronously.
+            listings = self._crawl_more(
+                scraper,
+                future.result(),
+                lambda page: pool.submit(scraper.parse_page, page).result(),
+            )
+        except Exception as exc:  # pragma: no cover - worker crashes
+            logger.error(f"[{scraper.source}] Parse worker failed: {exc}")
+            return None
+        return scraper, listings
+
+    def _crawl_more(
+        self,
+        scraper: BaseScraper,
+        listings: List[Listing],
+        parse: Callable[[str], List[Listing]],
+    ) -> List[Listing]:
+        """Walk further newest-first result pages after page 1.
+
+        Stops at `scraper.max_pages`, or as soon as a page holds nothing
+        unseen, i.e. every listing on it is already in storage (or was already
+        on an earlier page, which also catches sites that repeat the last page).
+        """
+        self.first_page_sizes[scraper.stats_key] = len(listings)
+        seen_ids = {listing.id for listing in listings}
+        batch = listings
+        page = 1
+        while page < scraper.max_pages and any(
+            self.storage.is_new_listing(listing.id) for listing in batch
+        ):
+            page += 1
+            page_content = scraper.fetch_raw(page)
+            if page_content is None:
+                break
+            batch = [listing for listing in parse(page_content) if listing.id not in seen_ids]
+            seen_ids.update(listing.id for listing in batch)
+            listings = listings + batch
+            logger.info(f"[{scraper.source}] Page {page}: {len(batch)} more listings")
+        return listings
+
+    def _fetch_pages(self) -> Iterator[Tuple[BaseScraper, str]]:
+        """Fetch stage: yield each active scraper's raw body, timing the fetch."""
+        for scraper in self._active_scrapers():
+            started = time.monotonic()
+            page_content = scraper.fetch_raw()
+            if self.stats is not None:
+                self.stats.record_latency(scraper.stats_key, time.monotonic() - started)
+            if page_content is not None:
+                yield scraper, page_content
+
+    def _active_scrapers(self) -> Iterator[BaseScraper]:
+        """Yield the scrapers this worker should run, most productive first.
+
+        Scrapers are ordered by `SourceStats` (recent new-listing yield per
+        second of latency) and, with a lease table, limited to the sources this
+        worker claimed; the lease is renewed right before each fetch so a slow
+        run does not let another worker take it over mid-fetch. Once the run
+        deadline is spent the remaining scrapers are skipped.
+        """
+        by_key = {scraper.stats_key: scraper for scraper in self.scrapers}
+        keys = self.stats.order(list(by_key)) if self.stats is not None else list(by_key)
+        if self.leases is not None:
+            # dict.fromkeys keeps the first (highest-priority) position per source.
+            lease_keys = list(dict.fromkeys(by_key[key].lease_key for key in keys))
+            claimed = set(self.leases.claim(lease_keys))
+            keys = [key for key in keys if by_key[key].lease_key in claimed]
+        for index, key in enumerate(keys):
+            if self.deadline is not None and self.deadline.expired:
+                logger.warning(f"Run deadline reached; skipping {len(keys) - index} sources")
+                return
+            lease_key = by_key[key].lease_key
+            if self.leases is not None and not self.leases.renew(lease_key):
+                logger.warning(f"Lost lease for {lease_key}; another worker took it over")
+                continue
+            yield by_key[key]
 
     def check_for_new_listings(self) -> None:
-        all_listings = []
-        for scraper in self.scrapers:
-            listings = scraper.fetch_listings()
-            all_listings.extend(listings)
+        """Notify new and changed listings source by source as each finishes."""
+        found = 0
+        queued: Set[str] = set()
+        for scraper, listings in self.iter_batches():
+            found += self._handle_batch(scraper, listings, queued)
+        if not found:
+            logger.info("No new listings found")
+
+        if self.stats is not None:
+            self.stats.save_stats()
+        if self.session_store is not None:
+            self.session_store.save_state()
+        if self.feed is not None:
+            self.feed.close()
+
+    def _handle_batch(self, scraper: BaseScraper, listings: List[Listing], queued: Set[str]) -> int:
+        """Deduplicate one scraper's batch against storage, notify and persist it.
 
-        new_listings = [listing for listing in all_listings if self.storage.is_new_listing(listing["id"])]
+        Returns the number of new listings. Storage is saved per batch, so a
+        run cut short still remembers everything it already notified.
+        """
+        if self.stats is not None:
+            size = self.first_page_sizes.get(scraper.stats_key, len(listings))
+            first_page = [listing.id for listing in listings[:size]]
+            self.storage.mark_offline(vanished(self.stats.first_page(scraper.stats_key), first_page))
+            self.stats.record_first_page(scraper.stats_key, first_page)
+
+        new_listings = []
+        changed_listings = []
+        relisted_listings = []
+        for listing in listings:
+            # The same listing can turn up in several town searches.
+            if listing.id in queued:
+                continue
+            queued.add(listing.id)
+            status = self.storage.classify(listing)
+            if status == NEW:
+                new_listings.append(listing)
+            elif status == CHANGED:
+                changed_listings.append(listing)
+            elif status == RELISTED:
+                relisted_listings.append(listing)
+        if self.stats is not None:
+            self.stats.record_yield(scraper.stats_key, len(new_listings))
+
+        if changed_listings:
+            logger.info(f"[{scraper.source}] Found {len(changed_listings)} changed listings")
+            for listing in changed_listings:
+                self.notifier.notify_changed_listing(listing)
+                if self.feed is not None:
+                    self.feed.write(listing, event="changed")
+        if relisted_listings:
+            logger.info(f"[{scraper.source}] Found {len(relisted_listings)} relisted listings")
+            for listing in relisted_listings:
+                self.notifier.notify_relisted_listing(listing)
+                if self.feed is not None:
+                    self.feed.write(listing, event="relisted")
         if new_listings:
-            logger.info(f"Found {len(new_listings)} new listings across all sources")
+            logger.info(f"[{scraper.source}] Found {len(new_listings)} new listings")
+            if self.enricher and not (self.deadline is not None and self.deadline.expired):
+                self.enricher.enrich(new_listings, fetch=scraper.fetch_detail)
             for listing in new_listings:
                 self.notifier.notify_new_listing(listing)
-        else:
-            logger.info("No new listings found")
+                if self.feed is not None:
+                    self.feed.write(listing, event="new")
+        if self.feed is not None:
+            self.feed.flush()
 
-        self.storage.update_with_listings(all_listings)
+        self.storage.update_with_listings(listings)
+        return len(new_listings)
 
 
 def _location_scrapers(location: str) -> List[BaseScraper]:
@@ -53,32 +307,48 @@ def _location_scrapers(location: str) -> List[BaseScraper]:
     back down to the towns we actually want.
     """
     slug = location.lower()
+    # The multi-page crawl relies on newest-first results: Pararius and
+    # Huurwoningen sort by date by default, 123Wonen needs /sort/newest.
     return [
         ParariusScraper(
             f"https://www.pararius.com/apartments/{slug}/{PRICE_RANGE}",
             source="Pararius",
             locations=LOCATIONS,
+            radius_km=LOCATION_RADIUS_KM,
+            max_pages=MAX_PAGES,
         ),
         HuurwoningenScraper(
             f"https://www.huurwoningen.nl/in/{slug}/?price={PRICE_RANGE}",
             source="Huurwoningen",
             locations=LOCATIONS,
+            radius_km=LOCATION_RADIUS_KM,
+            max_pages=MAX_PAGES,
         ),
         NederwoonScraper(
             f"https://www.nederwoon.nl/search?search_type=1&city={quote_plus(location)}",
             source="Nederwoon",
             locations=LOCATIONS,
+            radius_km=LOCATION_RADIUS_KM,
         ),
         Wonen123Scraper(
-            f"https://www.123wonen.nl/huurwoningen/in/{slug}",
+            f"https://www.123wonen.nl/huurwoningen/in/{slug}/sort/newest",
             source="123Wonen",
             locations=LOCATIONS,
+            radius_km=LOCATION_RADIUS_KM,
+            max_pages=MAX_PAGES,
         ),
     ]
 
 
 def run_bot() -> None:
     """Create scrapers for every configured location and run the bot once."""
+    deadline = Deadline(RUN_BUDGET)
+    missing = unknown_towns(LOCATIONS)
+    if missing:
+        logger.warning(
+            f"No postcodes for {', '.join(missing)} in the bundled PC4 table; "
+            "these locations are matched by town name only"
+        )
     scrapers: List[BaseScraper] = []
     for location in LOCATIONS:
         scrapers.extend(_location_scrapers(location))
@@ -92,6 +362,7 @@ def run_bot() -> None:
                 site_base_url="https://www.natuurlijkhuren.nl",
                 source="Triada (NatuurlijkHuren)",
                 locations=LOCATIONS,
+                radius_km=LOCATION_RADIUS_KM,
                 max_price=PRICE_MAX,
             ),
             Zig365Scraper(
@@ -99,11 +370,26 @@ def run_bot() -> None:
                 site_base_url="https://www.woonkeus-stedendriehoek.nl",
                 source="Woonkeus",
                 locations=LOCATIONS,
+                radius_km=LOCATION_RADIUS_KM,
                 max_price=PRICE_MAX,
                 detail_path="/aanbod/nu-te-huur/huurwoningen/details/",
             ),
         ]
     )
 
-    bot = MultiRentalBot(scrapers)
-    bot.check_for_new_listings()
+    if LEASE_DB and not WORKER_ID:
+        raise SystemExit("Set WORKER_ID to a stable name per worker when LEASE_DB is set")
+    leases = LeaseTable(LEASE_DB, WORKER_ID, LEASE_TTL, WORKER_TTL) if LEASE_DB else None
+    bot = MultiRentalBot(
+        scrapers,
+        leases=leases,
+        deadline=deadline,
+        stats=SourceStats(SOURCE_STATS_FILE),
+        session_store=SessionStore(SESSION_STATE_FILE),
+        feed=ListingFeed(FEED_FILE, FEED_MAX_BYTES, FEED_ROTATE_SECONDS, FEED_GZIP) if FEED_FILE else None,
+    )
+    try:
+        bot.check_for_new_listings()
+    finally:
+        if leases:
+            leases.close()
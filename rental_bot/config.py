@@ -17,6 +17,10 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "your_default_chat_id")
 DEFAULT_LOCATIONS = "Apeldoorn,Epe,Vaassen,Heerde,Hattem,Wapenveld,Emst,Oene,Veessen"
 LOCATIONS = [loc.strip() for loc in os.environ.get("LOCATIONS", DEFAULT_LOCATIONS).split(",") if loc.strip()]
 
+# Optionally widen every location to all towns/postcodes within this many km
+# (e.g. LOCATION_RADIUS_KM=15 for "within 15 km of Apeldoorn").
+LOCATION_RADIUS_KM = float(os.environ.get("LOCATION_RADIUS_KM", "0"))
+
 PRICE_RANGE = os.environ.get("PRICE_RANGE", "0-1500")
 # CITY kept as a backward-compatible alias (first location) for older imports.
 CITY = os.environ.get("CITY", LOCATIONS[0] if LOCATIONS else "Apeldoorn")
@@ -30,3 +34,54 @@ def _parse_max_price(price_range: str):
 
 
 PRICE_MAX = _parse_max_price(PRICE_RANGE)
+
+# Worker processes for the parse stage. Fetching runs on its own thread while
+# BeautifulSoup/JSON parsing of earlier pages runs in a process pool; set to 1
+# to fetch and parse inline (no pool, no thread).
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 1))
+
+# Detail-page enrichment (rooms, m², availability) for new listings only.
+ENRICH_DETAILS = os.environ.get("ENRICH_DETAILS", "1").lower() not in ("0", "false", "no")
+DETAIL_CACHE_FILE = os.environ.get("DETAIL_CACHE_FILE", "detail_cache.json")
+DETAIL_WORKERS_PER_HOST = int(os.environ.get("DETAIL_WORKERS_PER_HOST", "2"))
+
+# Multi-worker coordination. Set LEASE_DB to a SQLite path shared by all bot
+# instances to split sources between them; empty means a single worker. With
+# LEASE_DB, WORKER_ID is required and must stay the same across runs of one
+# worker (a per-process default would register every cron run as a new worker).
+LEASE_DB = os.environ.get("LEASE_DB", "")
+WORKER_ID = os.environ.get("WORKER_ID", "")
+LEASE_TTL = float(os.environ.get("LEASE_TTL", "600"))
+# A worker keeps its share of the sources this long after its last run; must be
+# longer than the cron interval or the workers stop seeing each other.
+WORKER_TTL = float(os.environ.get("WORKER_TTL", "3600"))
+
+# Wall-clock budget (seconds) for one run so slow hosts can't make cron runs
+# overlap; 0 disables it. Per-source yield/latency history decides fetch order.
+RUN_BUDGET = float(os.environ.get("RUN_BUDGET", "240"))
+SOURCE_STATS_FILE = os.environ.get("SOURCE_STATS_FILE", "source_stats.json")
+
+# A listing seen to go offline (gone from its first results page while older
+# listings remain) that shows up again at least this many runs later is
+# notified as relisted.
+RELIST_AFTER_RUNS = int(os.environ.get("RELIST_AFTER_RUNS", "48"))
+
+# Newest-first result pages walked per Pararius/Huurwoningen/123Wonen search.
+# The crawl stops early at the first page with no unseen listings, so normally
+# only page 1 is fetched.
+MAX_PAGES = int(os.environ.get("MAX_PAGES", "3"))
+
+# Cookies/clearance tokens per host and impersonation profile, restored at the
+# start of each run.
+SESSION_STATE_FILE = os.environ.get("SESSION_STATE_FILE", "session_state.json")
+
+# NDJSON feed of new/changed listings for downstream tools; empty disables it.
+# Segments rotate at FEED_MAX_BYTES or FEED_ROTATE_SECONDS, gzipped if FEED_GZIP.
+FEED_FILE = os.environ.get("FEED_FILE", "")
+FEED_MAX_BYTES = int(os.environ.get("FEED_MAX_BYTES", "10000000"))
+FEED_ROTATE_SECONDS = float(os.environ.get("FEED_ROTATE_SECONDS", "86400"))
+FEED_GZIP = os.environ.get("FEED_GZIP", "1").lower() not in ("0", "false", "no")
+
+# Local query API (`python -m rental_bot.api`), serving the FEED_FILE contents.
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", "8080"))
@@ -0,0 +1,120 @@
+"""Source partitioning between several bot instances.
+
+When more than one worker runs (e.g. one per network egress), each source
+should be fetched by exactly one of them. Workers share a small SQLite file:
+
+* every run records a heartbeat for its worker; a worker counts as live for
+  ``worker_ttl`` seconds after its last run, so the heartbeat must outlast the
+  cron interval;
+* each source has a fixed owner among the live workers, picked by rendezvous
+  hashing over the worker IDs, so the split does not depend on which worker
+  starts first and only the sources of a worker that joins or leaves move;
+* a worker holds a lease on the sources it fetches for ``ttl`` seconds, renews
+  it right before each fetch and releases it when the run ends. A source whose
+  owner changed is only taken over once the previous holder's lease is gone.
+
+A source falls to another worker only when its owner's heartbeat expires.
+SQLite's ``BEGIN IMMEDIATE`` serialises the claim step across processes, so no
+extra lock service is needed.
+"""
+import hashlib
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from .config import logger
+
+
+def _rank(worker_id: str, key: str) -> bytes:
+    return hashlib.blake2b(f"{worker_id}|{key}".encode("utf-8"), digest_size=8).digest()
+
+
+class LeaseTable:
+    def __init__(self, db_path: str, worker_id: str, ttl: float = 600, worker_ttl: float = 3600):
+        self.db_path = db_path
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.worker_ttl = worker_ttl
+        # With a parse pool the bot claims and renews leases from its fetch
+        # thread; only one thread uses the table at a time.
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expires REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS workers (worker_id TEXT PRIMARY KEY, last_seen REAL)"
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def claim(self, keys: List[str]) -> List[str]:
+        """Record a heartbeat and lease the `keys` this worker owns, in order.
+
+        A key is owned by the live worker that ranks highest for it. Owned keys
+        still leased by another worker (whose run started before ownership
+        moved) are skipped this run.
+        """
+        now = time.time()
+        with self._transaction():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, last_seen) VALUES (?, ?)",
+                (self.worker_id, now),
+            )
+            live = [
+                worker_id
+                for (worker_id,) in self.conn.execute(
+                    "SELECT worker_id FROM workers WHERE last_seen > ?", (now - self.worker_ttl,)
+                )
+            ]
+            held_by_others = {
+                key
+                for (key,) in self.conn.execute(
+                    "SELECT key FROM leases WHERE owner != ? AND expires > ?", (self.worker_id, now)
+                )
+            }
+            claimed = [
+                key
+                for key in keys
+                if max(live, key=lambda worker_id: _rank(worker_id, key)) == self.worker_id
+                and key not in held_by_others
+            ]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                [(key, self.worker_id, now + self.ttl) for key in claimed],
+            )
+        logger.info(
+            f"Worker {self.worker_id} holds {len(claimed)}/{len(keys)} source leases "
+            f"({len(live)} live workers)"
+        )
+        return claimed
+
+    def renew(self, key: str) -> bool:
+        """Extend a lease held by this worker. False if it was lost or expired."""
+        now = time.time()
+        with self._transaction():
+            cursor = self.conn.execute(
+                "UPDATE leases SET expires = ? WHERE key = ? AND owner = ? AND expires > ?",
+                (now + self.ttl, key, self.worker_id, now),
+            )
+        return cursor.rowcount == 1
+
+    def release(self) -> None:
+        """Give up this worker's leases. Its heartbeat stays, so it keeps its share."""
+        with self._transaction():
+            self.conn.execute("DELETE FROM leases WHERE owner = ?", (self.worker_id,))
+
+    def close(self) -> None:
+        """Release this worker's leases so the next run can claim them, then close."""
+        try:
+            self.release()
+        finally:
+            self.conn.close()
@@ -0,0 +1,145 @@
+"""Detail-page enrichment for newly found listings.
+
+Search-result pages only give title, price and address. Room count, floor area
+and availability live on each listing's detail page, so we fetch those pages —
+but only for listings that are new this run, with a small per-host worker limit
+and an on-disk cache keyed by URL so a detail page is fetched at most once.
+"""
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+from curl_cffi import requests as cffi_requests
+
+from .config import logger
+from .listing import Listing
+from .scheduling import Deadline, DeadlineExceeded
+
+_AREA_RE = re.compile(r"(\d{2,4})(?:[.,]\d+)?\s*(?:m²|m2)\b", re.I)
+_ROOMS_AFTER_RE = re.compile(r"(\d{1,2})\s*(?:kamers?|rooms?|slaapkamers?|bedrooms?)\b", re.I)
+_ROOMS_BEFORE_RE = re.compile(
+    r"(?:aantal kamers|number of rooms|kamers|rooms)\s*:?\s*(\d{1,2})\b", re.I
+)
+_AVAILABLE_RE = re.compile(
+    r"(?:beschikbaar(?:\s+(?:per|vanaf))?|available(?:\s+from)?|ingangsdatum|huur\s+per)"
+    r"\s*:?\s*(per direct|direct|immediately|\d{1,2}[-/ ](?:\d{1,2}|[a-z]+)[-/ ]\d{2,4})",
+    re.I,
+)
+
+
+def extract_details(page_content: str) -> Dict[str, Optional[object]]:
+    """Pull rooms, area (m²) and availability out of a detail page's text.
+
+    The sites use different markup, so this works on the visible text with
+    label patterns shared across them (Dutch and English).
+    """
+    text = BeautifulSoup(page_content, "html.parser").get_text(" ", strip=True)
+    area = _AREA_RE.search(text)
+    rooms = _ROOMS_BEFORE_RE.search(text) or _ROOMS_AFTER_RE.search(text)
+    available = _AVAILABLE_RE.search(text)
+    return {
+        "rooms": int(rooms.group(1)) if rooms else None,
+        "area": int(area.group(1)) if area else None,
+        "available_from": available.group(1) if available else None,
+    }
+
+
+class DetailEnricher:
+    def __init__(
+        self,
+        cache_file: str = "detail_cache.json",
+        workers_per_host: int = 2,
+        deadline: Optional[Deadline] = None,
+    ):
+        self.cache_file = cache_file
+        self.workers_per_host = max(1, workers_per_host)
+        # Run budget shared with the scrapers: no detail fetch starts after it
+        # is spent, and request timeouts are clipped to what is left.
+        self.deadline = deadline
+        self.cache: Dict[str, Dict] = {}
+        self.load_cache()
+
+    def load_cache(self) -> None:
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                self.cache = json.load(f)
+        except Exception as exc:  # pragma: no cover - file errors
+            logger.error(f"Error loading detail cache: {exc}")
+
+    def save_cache(self) -> None:
+        try:
+            with open(self.cache_file, "w") as f:
+                json.dump(self.cache, f)
+        except Exception as exc:  # pragma: no cover - file errors
+            logger.error(f"Error saving detail cache: {exc}")
+
+    def fetch_detail(self, url: str) -> str:
+        """Fallback single request, used when no scraper fetch is passed in."""
+        timeout = 30
+        if self.deadline is not None:
+            # A zero timeout would mean "no timeout" to curl.
+            if self.deadline.expired:
+                raise DeadlineExceeded(f"Run deadline reached, skipping detail page {url}")
+            timeout = self.deadline.timeout(timeout)
+        response = cffi_requests.get(url, impersonate="chrome", timeout=timeout)
+        response.raise_for_status()
+        return response.text
+
+    def enrich(self, listings: List[Listing], fetch: Optional[Callable[[str], str]] = None) -> None:
+        """Fill rooms/area/available_from on `listings` in place.
+
+        Callers pass only new listings; cached URLs cost no request and failed
+        fetches are logged and left unenriched, as are those not started before
+        the run deadline. `fetch` is normally the owning scraper's
+        `fetch_detail`, so detail pages get the same retries, Cloudflare
+        cookies and deadline-clipped timeouts as its search pages.
+        """
+        fetch = fetch or self.fetch_detail
+        missing = []
+        for listing in listings:
+            if not listing.url:
+                continue
+            if listing.url in self.cache:
+                self._apply(listing, self.cache[listing.url])
+            else:
+                missing.append(listing)
+        if not missing:
+            return
+
+        host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        for listing in missing:
+            host = urlparse(listing.url).netloc
+            if host not in host_limits:
+                host_limits[host] = threading.BoundedSemaphore(self.workers_per_host)
+
+        def work(listing: Listing) -> bool:
+            with host_limits[urlparse(listing.url).netloc]:
+                # Queued fetches that get their turn after the deadline are dropped.
+                if self.deadline is not None and self.deadline.expired:
+                    return False
+                try:
+                    details = extract_details(fetch(listing.url))
+                except Exception as exc:  # pragma: no cover - network errors
+                    logger.warning(f"[{listing.source}] Detail fetch failed for {listing.url}: {exc}")
+                    return False
+            self.cache[listing.url] = details
+            self._apply(listing, details)
+            return True
+
+        with ThreadPoolExecutor(max_workers=self.workers_per_host * len(host_limits)) as pool:
+            enriched = sum(pool.map(work, missing))
+        logger.info(f"Enriched {enriched}/{len(missing)} listings from detail pages")
+        self.save_cache()
+
+    @staticmethod
+    def _apply(listing: Listing, details: Dict) -> None:
+        listing.rooms = details.get("rooms")
+        listing.area = details.get("area")
+        listing.available_from = details.get("available_from")
@@ -0,0 +1,186 @@
+"""Append-only NDJSON feed of new and changed listings.
+
+Each event is one JSON object per line, so downstream tools can ``tail -f`` the
+feed instead of reading the Telegram chat. Writes are buffered and the file is
+rotated by size or age; rotated segments are renamed with a UTC timestamp and
+optionally gzipped.
+
+Overlapping runs may append to the same feed. Buffered lines only reach the
+file in `flush`, under an advisory lock that `rotate` also takes, and the
+writer reopens the path first if another run rotated it in the meantime; so no
+run ever appends to a segment that is being compressed and removed.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+from .config import logger
+
+_SEGMENT_RE = re.compile(r"\.(\d{8}T\d{6}Z)(?:-(\d+))?(\.gz)?")
+
+
+def rotated_segments(path: str) -> List[str]:
+    """Rotated segments of the feed at `path`, oldest first.
+
+    Only names `_rotate` produces are returned (``<path>.<stamp>[-N][.gz]``),
+    ordered by stamp and then collision suffix. While a segment is being
+    compressed both copies exist and only the finished plain one is returned.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    segments: Dict[Tuple[str, int], str] = {}
+    for entry in os.listdir(directory):
+        if not entry.startswith(name):
+            continue
+        match = _SEGMENT_RE.fullmatch(entry, len(name))
+        if not match:
+            continue
+        key = (match.group(1), int(match.group(2) or 0))
+        if match.group(3):
+            segments.setdefault(key, os.path.join(directory, entry))
+        else:
+            segments[key] = os.path.join(directory, entry)
+    return [segments[key] for key in sorted(segments)]
+
+
+class ListingFeed:
+    def __init__(
+        self,
+        path: str = "listings.ndjson",
+        max_bytes: int = 10_000_000,
+        max_age: float = 86400,
+        compress: bool = True,
+        buffer_size: int = 64 * 1024,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self._file = None
+        self._inode: Optional[int] = None
+        self._size = 0
+        self._started: Optional[datetime] = None
+        # (recorded_at, line) pairs not yet written to the file.
+        self._pending: List[Tuple[datetime, str]] = []
+        self._pending_bytes = 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if fcntl is None:  # pragma: no cover - non-POSIX platforms
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._size = os.fstat(self._file.fileno()).st_size
+        # The segment's age counts from its first record, which survives restarts.
+        self._started = self._first_record_time()
+
+    def _rotated(self) -> bool:
+        """True if the path no longer points at the file we have open."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def _first_record_time(self) -> Optional[datetime]:
+        if not self._size:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return datetime.fromisoformat(json.loads(f.readline())["recorded_at"])
+        except Exception:  # pragma: no cover - damaged first line
+            return datetime.now(timezone.utc)
+
+    def _should_rotate(self, now: datetime) -> bool:
+        if not self._size:
+            return False
+        if self.max_bytes and self._size >= self.max_bytes:
+            return True
+        return bool(self.max_age and self._started and (now - self._started).total_seconds() >= self.max_age)
+
+    def rotate(self) -> None:
+        """Close the current segment and start a new one."""
+        self.flush()
+        with self._locked():
+            self._rotate()
+
+    def _rotate(self) -> None:
+        # Caller holds the lock.
+        self._close_file()
+        if not os.path.exists(self.path):
+            return
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        rotated = f"{self.path}.{stamp}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{self.path}.{stamp}-{suffix}"
+            suffix += 1
+        os.replace(self.path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        logger.info(f"Rotated listing feed to {rotated}{'.gz' if self.compress else ''}")
+
+    def write(self, listing: Dict, event: str = "new") -> None:
+        now = datetime.now(timezone.utc)
+        record = listing.to_dict() if hasattr(listing, "to_dict") else dict(listing)
+        record["event"] = event
+        record["recorded_at"] = now.isoformat()
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._pending.append((now, line))
+        self._pending_bytes += len(line)
+        if self._pending_bytes >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append the buffered lines, rotating between them as needed."""
+        if not self._pending:
+            return
+        with self._locked():
+            if self._file is not None and self._rotated():
+                # Another run rotated the feed; follow the path to the new segment.
+                self._close_file()
+            elif self._file is not None:
+                # Count what other runs appended since our last flush.
+                self._size = os.fstat(self._file.fileno()).st_size
+            for now, line in self._pending:
+                if self._file is None:
+                    self._open()
+                if self._should_rotate(now):
+                    self._rotate()
+                    self._open()
+                self._file.write(line)
+                self._size += len(line.encode("utf-8"))
+                if self._started is None:
+                    self._started = now
+            self._file.flush()
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        self.flush()
+        self._close_file()
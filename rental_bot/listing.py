@@ -0,0 +1,138 @@
+"""Typed listing record produced by every scraper.
+
+Listings flow from the scrapers through location filtering, storage and
+notification. A slotted class keeps them small (no per-instance ``__dict__``,
+no repeated string keys) while the mapping-style accessors keep older code that
+does ``listing["id"]`` or ``listing.get("address")`` working unchanged.
+"""
+import hashlib
+import re
+from typing import Any, Dict, Mapping, Optional, Union
+
+_NUMBER_RE = re.compile(r"\d[\d.,]*")
+
+
+def parse_price(price: Union[str, int, float, None]) -> Optional[float]:
+    """Best-effort numeric rent from strings like "€ 1.250 per maand".
+
+    Handles both Dutch ("1.250,00") and English ("1,250.00") grouping. A single
+    separator followed by exactly three digits is read as a thousands separator.
+    Returns None when no number is present ("Prijs onbekend").
+    """
+    if price is None:
+        return None
+    if isinstance(price, (int, float)):
+        return float(price)
+    match = _NUMBER_RE.search(price)
+    if not match:
+        return None
+    number = match.group(0).rstrip(".,")
+    if "." in number and "," in number:
+        decimal = max(number.rfind("."), number.rfind(","))
+        integer = number[:decimal].replace(".", "").replace(",", "")
+        number = f"{integer}.{number[decimal + 1:]}"
+    else:
+        separator = "." if "." in number else "," if "," in number else None
+        if separator:
+            parts = number.split(separator)
+            if len(parts) > 2 or len(parts[-1]) == 3:
+                number = "".join(parts)
+            else:
+                number = ".".join(parts)
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def listing_fingerprint(listing: Mapping) -> str:
+    """Short hash over the fields whose change is worth a notification.
+
+    Covers what the search pages show (price, title, details); detail-page
+    fields are left out because only new listings are enriched.
+    """
+    content = "\x1f".join(
+        str(listing.get(key) or "") for key in ("price", "title", "details")
+    )
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class Listing:
+    """A single rental listing.
+
+    ``price`` keeps the text as shown on the site for notifications, while
+    ``price_value`` holds the parsed number for filtering. ``timestamp`` is the
+    run-level fetch time shared by every listing from the same scraper run.
+    ``rooms``, ``area`` (m²) and ``available_from`` are only known after detail
+    enrichment and stay None otherwise.
+    """
+
+    __slots__ = (
+        "id",
+        "title",
+        "url",
+        "price",
+        "address",
+        "source",
+        "timestamp",
+        "details",
+        "price_value",
+        "rooms",
+        "area",
+        "available_from",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        url: str,
+        price: str,
+        address: str,
+        source: str,
+        timestamp: str,
+        details: str = "",
+        price_value: Optional[float] = None,
+        rooms: Optional[int] = None,
+        area: Optional[int] = None,
+        available_from: Optional[str] = None,
+    ):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.price = price
+        self.address = address
+        self.source = source
+        self.timestamp = timestamp
+        self.details = details
+        self.price_value = parse_price(price) if price_value is None else price_value
+        # Filled in from the detail page by `enrichment.DetailEnricher`.
+        self.rooms = rooms
+        self.area = area
+        self.available_from = available_from
+
+    # Mapping-style access for code written against the old per-listing dicts.
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Listing):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"Listing(id={self.id!r}, source={self.source!r}, title={self.title!r})"
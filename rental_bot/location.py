@@ -4,27 +4,165 @@ Some sites (notably Pararius) fall back to a wider regional search when a small
 village isn't a recognised location, returning listings from other towns. We
 filter parsed listings against the target locations so users don't get e.g.
 Deventer results under a "Vaassen" search.
+
+Postal codes are resolved through a PC4 table (``data/pc4.csv``: 4-digit
+postcode, town, municipality and centroid), held as dense arrays indexed
+directly by postcode plus a coarse lat/lon grid for "within N km of" queries.
+
+A location's postcodes are those of the town *and* of the municipality with
+that name. "Apeldoorn" therefore covers every village in the municipality
+(Ugchelen, Beekbergen, Loenen, Hoenderloo, Klarenbeek, Lieren), "Epe" covers
+Vaassen, Emst and Oene and "Heerde" covers Wapenveld and Veessen; this is wider
+than the hand-kept ranges it replaced (Apeldoorn was 7300-7349). A village
+name only covers its own postcodes, e.g. "Wapenveld" no longer includes
+Veessen's 8194. An address without a postcode only matches on the location's
+own name, not on the names of its villages.
+
+The bundled table is regional, not national: it covers the default locations
+and their neighbouring municipalities (Apeldoorn, Epe, Heerde, Hattem, Voorst,
+Deventer, Zutphen, Zwolle), some of them only partly, and every postcode of a
+town carries that town's centre as its centroid, so radius searches compare
+town centres. Towns missing from the table fall back to name-only matching
+(`unknown_towns` lists them). ``scripts/build_pc4.py`` regenerates the file as
+a national extract, with a centroid per postcode, from PDOK's BAG-based
+Locatieserver.
 """
+import csv
+import math
 import re
-from typing import Iterable
-
-# 4-digit postal-code ranges per town (inclusive). Used as a backup signal when
-# the town name itself isn't spelled out in the address string.
-TOWN_POSTCODES = {
-    "apeldoorn": [(7300, 7349)],
-    "epe": [(8160, 8166)],
-    "emst": [(8166, 8166)],
-    "oene": [(8167, 8167)],
-    "vaassen": [(8170, 8172)],
-    "heerde": [(8180, 8186)],
-    "veessen": [(8194, 8194)],
-    "wapenveld": [(8190, 8196)],
-    "hattem": [(8050, 8056)],
-}
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Pattern, Set, Tuple
+
+PC4_FILE = Path(__file__).resolve().parent / "data" / "pc4.csv"
+
+# Grid cell size in degrees for the neighbour index (~11 km north-south).
+_CELL_DEG = 0.1
+_KM_PER_DEG_LAT = 111.2
 
 _POSTCODE_RE = re.compile(r"\b(\d{4})\s?[A-Za-z]{2}\b|\b(\d{4})\b")
 
 
+class PostcodeIndex:
+    """PC4 lookups in O(1) by indexing arrays with the postcode itself."""
+
+    SIZE = 10000
+
+    def __init__(self, rows: Iterable[Tuple[int, str, str, float, float]]):
+        # Name id 0 means "no such postcode".
+        self.names: List[str] = [""]
+        name_ids: Dict[str, int] = {}
+        self.town = array("H", [0]) * self.SIZE
+        self.municipality = array("H", [0]) * self.SIZE
+        self.lat = array("f", [0.0]) * self.SIZE
+        self.lon = array("f", [0.0]) * self.SIZE
+        # Postcodes per lower-cased town *and* municipality name: a location that
+        # names a municipality covers all of its villages (see module docstring).
+        self.postcodes_by_name: Dict[str, Set[int]] = {}
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+
+        for code, town, municipality, lat, lon in rows:
+            for target, name in ((self.town, town), (self.municipality, municipality)):
+                if name not in name_ids:
+                    name_ids[name] = len(self.names)
+                    self.names.append(name)
+                target[code] = name_ids[name]
+                self.postcodes_by_name.setdefault(name.lower(), set()).add(code)
+            self.lat[code] = lat
+            self.lon[code] = lon
+            self.grid.setdefault(self._cell(lat, lon), []).append(code)
+
+    @classmethod
+    def from_csv(cls, path: Path = PC4_FILE) -> "PostcodeIndex":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(
+                (int(row["pc4"]), row["town"], row["municipality"], float(row["lat"]), float(row["lon"]))
+                for row in csv.DictReader(f)
+            )
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> Tuple[int, int]:
+        return int(lat // _CELL_DEG), int(lon // _CELL_DEG)
+
+    def lookup(self, code: int) -> Optional[Tuple[str, str]]:
+        """(town, municipality) for a 4-digit postcode, or None if unknown."""
+        if not 0 <= code < self.SIZE or not self.town[code]:
+            return None
+        return self.names[self.town[code]], self.names[self.municipality[code]]
+
+    def centroid(self, name: str) -> Optional[Tuple[float, float]]:
+        codes = self.postcodes_by_name.get(name.strip().lower())
+        if not codes:
+            return None
+        return (
+            sum(self.lat[code] for code in codes) / len(codes),
+            sum(self.lon[code] for code in codes) / len(codes),
+        )
+
+    def within(self, name: str, radius_km: float) -> FrozenSet[int]:
+        """Postcodes of `name` plus every postcode within `radius_km` of it."""
+        own = self.postcodes_by_name.get(name.strip().lower(), set())
+        center = self.centroid(name)
+        if center is None or radius_km <= 0:
+            return frozenset(own)
+        lat0, lon0 = center
+        km_per_deg_lon = _KM_PER_DEG_LAT * math.cos(math.radians(lat0))
+        row0, col0 = self._cell(lat0, lon0)
+        rows = math.ceil(radius_km / (_KM_PER_DEG_LAT * _CELL_DEG))
+        cols = math.ceil(radius_km / (km_per_deg_lon * _CELL_DEG))
+        found = set(own)
+        for row in range(row0 - rows, row0 + rows + 1):
+            for col in range(col0 - cols, col0 + cols + 1):
+                for code in self.grid.get((row, col), ()):
+                    d_lat = (self.lat[code] - lat0) * _KM_PER_DEG_LAT
+                    d_lon = (self.lon[code] - lon0) * km_per_deg_lon
+                    if math.hypot(d_lat, d_lon) <= radius_km:
+                        found.add(code)
+        return frozenset(found)
+
+    def towns_within(self, name: str, radius_km: float) -> FrozenSet[str]:
+        """Lower-cased town names for the postcodes within `radius_km`."""
+        return frozenset(self.names[self.town[code]].lower() for code in self.within(name, radius_km))
+
+
+@lru_cache(maxsize=1)
+def postcode_index() -> PostcodeIndex:
+    return PostcodeIndex.from_csv()
+
+
+@lru_cache(maxsize=256)
+def _town_area(town: str, radius_km: float) -> Tuple[Pattern, FrozenSet[int]]:
+    """Name regex and postcode set for `town` (lower-cased) within `radius_km`."""
+    index = postcode_index()
+    names = {town}
+    if radius_km > 0:
+        names.update(index.towns_within(town, radius_km))
+    # Word-boundary name match avoids false hits (e.g. "Epe" inside another word).
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(name) for name in sorted(names)) + r")\b"
+    )
+    return pattern, index.within(town, radius_km)
+
+
+def expand_towns(towns: Iterable[str], radius_km: float = 0.0) -> FrozenSet[str]:
+    """Lower-cased `towns` plus every town within `radius_km` of any of them."""
+    index = postcode_index()
+    expanded: Set[str] = set()
+    for town in towns:
+        town_l = town.strip().lower()
+        expanded.add(town_l)
+        if radius_km > 0:
+            expanded.update(index.towns_within(town_l, radius_km))
+    return frozenset(expanded)
+
+
+def unknown_towns(towns: Iterable[str]) -> List[str]:
+    """The `towns` the PC4 table has no postcodes for (matched by name only)."""
+    index = postcode_index()
+    return [town for town in towns if town.strip().lower() not in index.postcodes_by_name]
+
+
 def _postcodes_in(address: str):
     for m in _POSTCODE_RE.finditer(address):
         code = m.group(1) or m.group(2)
@@ -32,23 +170,20 @@ def _postcodes_in(address: str):
             yield int(code)
 
 
-def address_matches(address: str, town: str) -> bool:
-    """True if `address` plausibly lies in `town` (by name or postal code)."""
+def address_matches(address: str, town: str, radius_km: float = 0.0) -> bool:
+    """True if `address` plausibly lies in `town` (by name or postal code).
+
+    With `radius_km`, any town or postcode within that distance of `town`'s
+    centroid also counts.
+    """
     if not address or not town:
         return False
-    town_l = town.strip().lower()
-    address_l = address.lower()
-    # Word-boundary name match avoids false hits (e.g. "Epe" inside another word).
-    if re.search(rf"\b{re.escape(town_l)}\b", address_l):
+    name_re, postcodes = _town_area(town.strip().lower(), radius_km)
+    if name_re.search(address.lower()):
         return True
-    ranges = TOWN_POSTCODES.get(town_l)
-    if ranges:
-        for code in _postcodes_in(address):
-            if any(low <= code <= high for low, high in ranges):
-                return True
-    return False
+    return any(code in postcodes for code in _postcodes_in(address))
 
 
-def address_matches_any(address: str, towns: Iterable[str]) -> bool:
+def address_matches_any(address: str, towns: Iterable[str], radius_km: float = 0.0) -> bool:
     """True if `address` matches any of the target `towns`."""
-    return any(address_matches(address, town) for town in towns)
+    return any(address_matches(address, town, radius_km) for town in towns)
@@ -3,6 +3,7 @@ import requests
 from typing import Dict
 
 from .config import logger
+from .listing import listing_fingerprint
 
 
 class NotificationSystem:
@@ -29,13 +30,38 @@ class NotificationSystem:
         if listing["id"] in self.notified_ids:
             return
         self.notified_ids.add(listing["id"])
+        self._notify(f"NEW LISTING FOUND [{listing['source']}]", listing)
+
+    def notify_changed_listing(self, listing: Dict) -> None:
+        """Notify a known listing whose price, title or details changed."""
+        key = (listing["id"], listing_fingerprint(listing))
+        if key in self.notified_ids:
+            return
+        self.notified_ids.add(key)
+        self._notify(f"LISTING UPDATED [{listing['source']}]", listing)
+
+    def notify_relisted_listing(self, listing: Dict) -> None:
+        """Notify a known listing that is back after being offline for a while."""
+        key = ("relisted", listing["id"])
+        if key in self.notified_ids:
+            return
+        self.notified_ids.add(key)
+        self._notify(f"LISTING BACK ONLINE [{listing['source']}]", listing)
+
+    def _notify(self, header: str, listing: Dict) -> None:
         message = (
-            f"NEW LISTING FOUND [{listing['source']}]:\n"
+            f"{header}:\n"
             f"Title: {listing['title']}\n"
             f"Price: {listing['price']}\n"
             f"Address: {listing['address']}\n"
-            f"URL: {listing['url']}"
         )
+        if listing.get("rooms"):
+            message += f"Rooms: {listing['rooms']}\n"
+        if listing.get("area"):
+            message += f"Area: {listing['area']} m²\n"
+        if listing.get("available_from"):
+            message += f"Available: {listing['available_from']}\n"
+        message += f"URL: {listing['url']}"
         self.send_telegram_message(message)
         print("\n" + "=" * 50)
         print(message)
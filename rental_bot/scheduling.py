@@ -0,0 +1,117 @@
+"""Run-time budget and source prioritisation.
+
+A run must finish before the next cron run starts, but `BaseScraper.fetch_page`
+retries (with sleeps) can otherwise add up without bound on a slow day. A
+`Deadline` is shared by every scraper in a run; once it is spent, remaining
+retries are cancelled. `SourceStats` remembers each source's recent yield of
+new listings and its fetch latency so the productive, fast sources go first and
+are the ones that still get fetched when the budget runs short. It also keeps
+the IDs on each source's last fetched first page, which tells the bot which
+listings went offline since.
+"""
+import json
+import math
+import os
+import time
+from typing import Dict, List, Optional
+
+from .config import logger
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a fetch is skipped or cut short by the run deadline."""
+
+
+class Deadline:
+    def __init__(self, seconds: Optional[float]):
+        # monotonic() is shared with forked parse workers, so the deadline can
+        # be pickled along with the scrapers.
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """A request timeout that never runs past the deadline."""
+        return min(cap, self.remaining())
+
+
+class SourceStats:
+    # Weight of the latest run in the moving averages.
+    ALPHA = 0.3
+    # Unknown sources are assumed productive so they get tried early.
+    DEFAULT_YIELD = 1.0
+    DEFAULT_LATENCY = 5.0
+
+    def __init__(self, stats_file: str = "source_stats.json"):
+        self.stats_file = stats_file
+        # key -> {"yield": ..., "latency": ..., "first_page": [listing IDs],
+        #         "updated": unix time of the last change}
+        self.stats: Dict[str, Dict] = {}
+        self.load_stats()
+
+    def load_stats(self) -> None:
+        if not os.path.exists(self.stats_file):
+            return
+        try:
+            with open(self.stats_file, "r") as f:
+                self.stats = json.load(f)
+        except Exception as exc:  # pragma: no cover - file errors
+            logger.error(f"Error loading source stats: {exc}")
+
+    def save_stats(self) -> None:
+        try:
+            with open(self.stats_file, "w") as f:
+                json.dump(self.stats, f)
+        except Exception as exc:  # pragma: no cover - file errors
+            logger.error(f"Error saving source stats: {exc}")
+
+    def _update(self, key: str, field: str, value: float, default: float) -> None:
+        entry = self.stats.setdefault(key, {})
+        previous = entry.get(field, default)
+        entry[field] = (1 - self.ALPHA) * previous + self.ALPHA * value
+        entry["updated"] = time.time()
+
+    def record_latency(self, key: str, seconds: float) -> None:
+        self._update(key, "latency", seconds, self.DEFAULT_LATENCY)
+
+    def record_yield(self, key: str, new_listings: int) -> None:
+        self._update(key, "yield", new_listings, self.DEFAULT_YIELD)
+
+    def first_page(self, key: str) -> List[str]:
+        """Listing IDs on the source's first page when it was last fetched."""
+        return self.stats.get(key, {}).get("first_page", [])
+
+    def record_first_page(self, key: str, listing_ids: List[str]) -> None:
+        entry = self.stats.setdefault(key, {})
+        entry["first_page"] = listing_ids
+        entry["updated"] = time.time()
+
+    def priority(self, key: str) -> float:
+        """New listings expected per second of fetching; higher goes first."""
+        entry = self.stats.get(key, {})
+        expected = entry.get("yield", self.DEFAULT_YIELD)
+        latency = entry.get("latency", self.DEFAULT_LATENCY)
+        return (expected + 0.1) / (latency + 1.0)
+
+    def order(self, keys: List[str]) -> List[str]:
+        # sorted() is stable, so equally ranked sources keep their configured order.
+        return sorted(keys, key=self.priority, reverse=True)
+
+
+def merge_stats_files(ours: str, theirs: str) -> None:
+    """Merge the stats file `ours` into `theirs`, in place.
+
+    Per source the entry updated last wins; see `storage.merge_storage_files`.
+    """
+    merged = SourceStats(theirs)
+    for key, entry in SourceStats(ours).stats.items():
+        if entry.get("updated", 0) >= merged.stats.get(key, {}).get("updated", 0):
+            merged.stats[key] = entry
+    merged.save_stats()
@@ -1,7 +1,8 @@
 """Scraper classes for various rental websites."""
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, List, Optional, Tuple
 import hashlib
+import json
 import time
 
 import requests
@@ -9,7 +10,10 @@ from curl_cffi import requests as cffi_requests
 from bs4 import BeautifulSoup
 
 from .config import CITY, logger
-from .location import address_matches_any
+from .listing import Listing, parse_price
+from .location import address_matches_any, expand_towns
+from .scheduling import Deadline, DeadlineExceeded
+from .session import SessionStore
 
 
 class BaseScraper:
@@ -21,6 +25,8 @@ class BaseScraper:
         user_agent: str = None,
         source: str = "Unknown",
         locations: Optional[List[str]] = None,
+        radius_km: float = 0.0,
+        max_pages: int = 1,
     ):
         self.search_url = search_url
         self.source = source
@@ -28,6 +34,13 @@ class BaseScraper:
         # fallback results (e.g. Pararius returning Deventer for "Vaassen") are
         # dropped. None means "keep everything".
         self.locations = locations
+        # Also keep listings within this many km of a target town (PC4 index).
+        self.radius_km = radius_km
+        # Upper bound for the newest-first crawl; MultiRentalBot stops earlier
+        # as soon as a page holds only listings it has already seen.
+        self.max_pages = max_pages
+        # One timestamp per scraper run instead of a datetime.now() per listing.
+        self.run_timestamp = datetime.now().isoformat()
         self.headers = {
             "User-Agent": user_agent
             or "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -46,15 +59,41 @@ class BaseScraper:
     # location pages per run; a miss is caught on the next 5-minute run.
     MAX_ATTEMPTS = 6
 
-    def fetch_page(self) -> str:
-        logger.info(f"[{self.source}] Fetching page: {self.search_url}")
+    # Run-level budget shared by all scrapers (set by MultiRentalBot). Once it is
+    # spent no further attempts are made and request timeouts are clipped to it.
+    deadline: Optional[Deadline] = None
+    # Cookies and clearance tokens carried over from earlier runs (set by
+    # MultiRentalBot). None means a fresh, cookieless request every time.
+    session_store: Optional[SessionStore] = None
+
+    def _request_timeout(self, cap: float = 30) -> float:
+        if self.deadline is None:
+            return cap
+        if self.deadline.expired:
+            raise DeadlineExceeded(f"[{self.source}] run deadline reached, skipping fetch")
+        return self.deadline.timeout(cap)
+
+    def _get(self, url: str, target: str, timeout: float, **kwargs):
+        """GET with the given impersonation profile, reusing the persisted
+        session (cookies/clearance) for this host when a store is attached."""
+        if self.session_store is None:
+            return cffi_requests.get(url, impersonate=target, timeout=timeout, **kwargs)
+        response = self.session_store.session(url, target).get(url, timeout=timeout, **kwargs)
+        self.session_store.record(url, target, ok=response.status_code < 400)
+        return response
+
+    def fetch_page(self, url: Optional[str] = None) -> str:
+        url = url or self.search_url
+        logger.info(f"[{self.source}] Fetching page: {url}")
+        targets = self.IMPERSONATE_TARGETS
+        if self.session_store is not None:
+            targets = self.session_store.preferred_profiles(url, targets)
         last_exc = None
         for attempt in range(self.MAX_ATTEMPTS):
-            target = self.IMPERSONATE_TARGETS[attempt % len(self.IMPERSONATE_TARGETS)]
+            target = targets[attempt % len(targets)]
+            timeout = self._request_timeout()
             try:
-                response = cffi_requests.get(
-                    self.search_url, impersonate=target, timeout=30
-                )
+                response = self._get(url, target, timeout)
                 response.raise_for_status()
                 return response.text
             except Exception as exc:
@@ -63,21 +102,59 @@ class BaseScraper:
                     f"[{self.source}] attempt {attempt + 1}/{self.MAX_ATTEMPTS} "
                     f"(impersonate={target}) failed: {exc}"
                 )
+                if self.deadline is not None and self.deadline.remaining() <= 2:
+                    raise DeadlineExceeded(
+                        f"[{self.source}] run deadline reached after {attempt + 1} attempts"
+                    ) from exc
                 time.sleep(2)
         raise last_exc
 
-    def fetch_listings(self) -> List[Dict]:
+    def fetch_detail(self, url: str) -> str:
+        """Fetch one listing's detail page.
+
+        Goes through the generic `BaseScraper.fetch_page` path (impersonation
+        profiles, retries, persisted session, deadline) even for scrapers that
+        override `fetch_page` for a JSON API.
+        """
+        return BaseScraper.fetch_page(self, url)
+
+    def fetch_listings(self) -> List[Listing]:
+        page_content = self.fetch_raw()
+        if page_content is None:
+            return []
+        return self.parse_page(page_content)
+
+    def fetch_raw(self, page: int = 1) -> Optional[str]:
+        """Fetch stage: return the raw page body, or None if every attempt failed.
+
+        Split from `parse_page` so `MultiRentalBot` can keep fetching the next
+        source while earlier bodies are parsed in a process pool.
+        """
+        url = self.page_url(page)
+        if url is None:
+            return None
+        try:
+            return self.fetch_page(url)
+        except Exception as exc:  # pragma: no cover - network errors
+            logger.error(f"[{self.source}] Error fetching listings: {exc}")
+            return None
+
+    def parse_page(self, page_content: str) -> List[Listing]:
+        """Parse stage: turn a raw body into location-filtered listings.
+
+        Pure CPU work with no shared state, so it is safe to run in a worker
+        process.
+        """
         try:
-            page_content = self.fetch_page()
             soup = BeautifulSoup(page_content, "html.parser")
             listings = self._filter_by_location(self.parse_listings(soup))
             logger.info(f"[{self.source}] Parsed {len(listings)} listings")
             return listings
-        except Exception as exc:  # pragma: no cover - network errors
-            logger.error(f"[{self.source}] Error fetching listings: {exc}")
+        except Exception as exc:  # pragma: no cover - parsing errors
+            logger.error(f"[{self.source}] Error parsing listings: {exc}")
             return []
 
-    def _filter_by_location(self, listings: List[Dict]) -> List[Dict]:
+    def _filter_by_location(self, listings: List[Listing]) -> List[Listing]:
         if not self.locations:
             return listings
         # Some sites put the town in the title rather than the address
@@ -88,18 +165,45 @@ class BaseScraper:
             if address_matches_any(
                 f"{listing.get('address', '')} {listing.get('title', '')}",
                 self.locations,
+                self.radius_km,
             )
         ]
 
-    def parse_listings(self, soup: BeautifulSoup) -> List[Dict]:
+    def parse_listings(self, soup: BeautifulSoup) -> List[Listing]:
         raise NotImplementedError
 
+    def page_url(self, page: int) -> Optional[str]:
+        """URL of results page `page` (1-based); None if the source has no paging."""
+        return self.search_url if page == 1 else None
+
+    @property
+    def lease_key(self) -> str:
+        """Unit of work in the multi-worker lease table: the whole source.
+
+        All town searches of one site go to the same worker. The regional
+        fallback makes one listing show up under several towns, and only the
+        worker that runs all of them can deduplicate it before notifying.
+        """
+        return self.source
+
+    @property
+    def stats_key(self) -> str:
+        """Identifies this source/location pair in `SourceStats`."""
+        return f"{self.source}|{self.search_url}"
+
     def generate_listing_id(self, url: str) -> str:
         return hashlib.md5((self.source + url).encode("utf-8")).hexdigest()
 
 
 class ParariusScraper(BaseScraper):
-    def parse_listings(self, soup: BeautifulSoup) -> List[Dict]:
+    # Search results are already newest first: the preselected sort is "Newest
+    # first" (published_at.desc, see tests/data/pararius_sample.html), so unlike
+    # 123Wonen the URL needs no sort segment for the early-stopping crawl.
+    def page_url(self, page: int) -> Optional[str]:
+        # Pararius pages are path segments: /apartments/{town}/{range}/page-2
+        return self.search_url if page == 1 else f"{self.search_url.rstrip('/')}/page-{page}"
+
+    def parse_listings(self, soup: BeautifulSoup) -> List[Listing]:
         listings = []
         seen_urls = set()
         search_list = soup.select(".search-list")
@@ -126,15 +230,15 @@ class ParariusScraper(BaseScraper):
                 address = address_element.text.strip() if address_element else "Address not specified"
                 listing_id = self.generate_listing_id(url)
                 listings.append(
-                    {
-                        "id": listing_id,
-                        "title": title,
-                        "url": url,
-                        "price": price,
-                        "address": address,
-                        "source": self.source,
-                        "timestamp": datetime.now().isoformat(),
-                    }
+                    Listing(
+                        id=listing_id,
+                        title=title,
+                        url=url,
+                        price=price,
+                        address=address,
+                        source=self.source,
+                        timestamp=self.run_timestamp,
+                    )
                 )
             except Exception as exc:  # pragma: no cover - parsing errors
                 logger.error(f"[{self.source}] Error parsing a listing: {exc}")
@@ -150,13 +254,16 @@ class WoonkeusScraper(BaseScraper):
         )
         super().__init__(json_api_url, user_agent, source)
 
-    def fetch_listings(self) -> List[Dict]:
+    def fetch_page(self, url: Optional[str] = None) -> str:
+        url = url or self.search_url
+        logger.info(f"[{self.source}] Fetching listings from JSON API: {url}")
+        response = requests.get(url, headers=self.headers)
+        response.raise_for_status()
+        return response.text
+
+    def parse_page(self, page_content: str) -> List[Listing]:
         try:
-            logger.info(f"[{self.source}] Fetching listings from JSON API: {self.search_url}")
-            response = requests.get(self.search_url, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
-            items = data.get("data", [])
+            items = json.loads(page_content).get("data", [])
             listings = []
             for item in items:
                 if item.get("gemeenteGeoLocatieNaam", "") != CITY:
@@ -177,25 +284,25 @@ class WoonkeusScraper(BaseScraper):
                 address = f"{full_street}, {city}"
                 listing_id = self.generate_listing_id(url)
                 listings.append(
-                    {
-                        "id": listing_id,
-                        "title": title,
-                        "url": url,
-                        "price": f"€ {total_rent}",
-                        "address": address,
-                        "source": self.source,
-                        "timestamp": datetime.now().isoformat(),
-                    }
+                    Listing(
+                        id=listing_id,
+                        title=title,
+                        url=url,
+                        price=f"€ {total_rent}",
+                        address=address,
+                        source=self.source,
+                        timestamp=self.run_timestamp,
+                    )
                 )
             logger.info(f"[{self.source}] Parsed {len(listings)} listings from JSON")
             return listings
-        except Exception as exc:  # pragma: no cover - network errors
-            logger.error(f"[{self.source}] Error fetching listings from JSON API: {exc}")
+        except Exception as exc:  # pragma: no cover - parsing errors
+            logger.error(f"[{self.source}] Error parsing listings from JSON API: {exc}")
             return []
 
 
 class NederwoonScraper(BaseScraper):
-    def parse_listings(self, soup: BeautifulSoup) -> List[Dict]:
+    def parse_listings(self, soup: BeautifulSoup) -> List[Listing]:
         listings = []
         locations_container = soup.find(id="locations")
         if not locations_container:
@@ -233,16 +340,16 @@ class NederwoonScraper(BaseScraper):
                     details = " | ".join(detail_items)
                 listing_id = self.generate_listing_id(url)
                 listings.append(
-                    {
-                        "id": listing_id,
-                        "title": title,
-                        "url": url,
-                        "price": price,
-                        "address": address,
-                        "details": details,
-                        "source": self.source,
-                        "timestamp": datetime.now().isoformat(),
-                    }
+                    Listing(
+                        id=listing_id,
+                        title=title,
+                        url=url,
+                        price=price,
+                        address=address,
+                        details=details,
+                        source=self.source,
+                        timestamp=self.run_timestamp,
+                    )
                 )
             except Exception as exc:  # pragma: no cover - parsing errors
                 logger.error(f"[{self.source}] Error parsing a location: {exc}")
@@ -252,7 +359,15 @@ class NederwoonScraper(BaseScraper):
 
 
 class HuurwoningenScraper(BaseScraper):
-    def parse_listings(self, soup: BeautifulSoup) -> List[Dict]:
+    def page_url(self, page: int) -> Optional[str]:
+        # Results default to "Nieuwste eerst" (published_at.desc); pages are a
+        # query parameter.
+        if page == 1:
+            return self.search_url
+        separator = "&" if "?" in self.search_url else "?"
+        return f"{self.search_url}{separator}page={page}"
+
+    def parse_listings(self, soup: BeautifulSoup) -> List[Listing]:
         listings = []
         listing_elements = soup.select(".listing-search-item__content")
         for element in listing_elements:
@@ -275,15 +390,15 @@ class HuurwoningenScraper(BaseScraper):
                 price = price_element.get_text(strip=True) if price_element else "Price not specified"
                 listing_id = self.generate_listing_id(url)
                 listings.append(
-                    {
-                        "id": listing_id,
-                        "title": title,
-                        "url": url,
-                        "price": price,
-                        "address": address,
-                        "source": self.source,
-                        "timestamp": datetime.now().isoformat(),
-                    }
+                    Listing(
+                        id=listing_id,
+                        title=title,
+                        url=url,
+                        price=price,
+                        address=address,
+                        source=self.source,
+                        timestamp=self.run_timestamp,
+                    )
                 )
             except Exception as exc:  # pragma: no cover - parsing errors
                 logger.error(f"[{self.source}] Error parsing a listing: {exc}")
@@ -292,7 +407,11 @@ class HuurwoningenScraper(BaseScraper):
 
 
 class Wonen123Scraper(BaseScraper):
-    def parse_listings(self, soup: BeautifulSoup) -> List[Dict]:
+    def page_url(self, page: int) -> Optional[str]:
+        # Search URLs use the /sort/newest ordering; pages append /page/N.
+        return self.search_url if page == 1 else f"{self.search_url.rstrip('/')}/page/{page}"
+
+    def parse_listings(self, soup: BeautifulSoup) -> List[Listing]:
         listings = []
         listing_elements = soup.select("div.pandlist-container")
         for element in listing_elements:
@@ -323,16 +442,16 @@ class Wonen123Scraper(BaseScraper):
                     details = " | ".join([li.get_text(" ", strip=True) for li in li_items])
                 listing_id = self.generate_listing_id(url)
                 listings.append(
-                    {
-                        "id": listing_id,
-                        "title": title,
-                        "url": url,
-                        "price": price,
-                        "address": address,
-                        "details": details,
-                        "source": self.source,
-                        "timestamp": datetime.now().isoformat(),
-                    }
+                    Listing(
+                        id=listing_id,
+                        title=title,
+                        url=url,
+                        price=price,
+                        address=address,
+                        details=details,
+                        source=self.source,
+                        timestamp=self.run_timestamp,
+                    )
                 )
             except Exception as exc:  # pragma: no cover - parsing errors
                 logger.error(f"[{self.source}] Error parsing a listing: {exc}")
@@ -361,54 +480,46 @@ class Zig365Scraper(BaseScraper):
         max_price: Optional[int] = None,
         detail_path: str = "/aanbod/te-huur/details/",
         limit: int = 100,
+        radius_km: float = 0.0,
     ):
         api_url = (
             f"https://{api_host}/api/v1/actueel-aanbod?"
             f"limit={limit}&locale=nl_NL&page=0&sort=-publicationDate"
         )
-        super().__init__(api_url, source=source, locations=locations)
+        super().__init__(api_url, source=source, locations=locations, radius_km=radius_km)
         self.site_base_url = site_base_url.rstrip("/")
         self.detail_path = detail_path
         self.max_price = max_price
 
-    def fetch_listings(self) -> List[Dict]:
+    def fetch_page(self, url: Optional[str] = None) -> str:
+        url = url or self.search_url
+        logger.info(f"[{self.source}] Fetching listings from JSON API: {url}")
+        response = self._get(
+            url,
+            "chrome",
+            self._request_timeout(),
+            headers={"Accept": "application/json"},
+        )
+        response.raise_for_status()
+        return response.text
+
+    def parse_page(self, page_content: str) -> List[Listing]:
         try:
-            logger.info(f"[{self.source}] Fetching listings from JSON API: {self.search_url}")
-            response = cffi_requests.get(
-                self.search_url,
-                impersonate="chrome",
-                headers={"Accept": "application/json"},
-                timeout=30,
-            )
-            response.raise_for_status()
-            listings = self.parse_items(response.json().get("data", []))
+            listings = self.parse_items(json.loads(page_content).get("data", []))
             logger.info(f"[{self.source}] Parsed {len(listings)} listings")
             return listings
-        except Exception as exc:  # pragma: no cover - network errors
-            logger.error(f"[{self.source}] Error fetching listings from JSON API: {exc}")
+        except Exception as exc:  # pragma: no cover - parsing errors
+            logger.error(f"[{self.source}] Error parsing listings from JSON API: {exc}")
             return []
 
-    def parse_items(self, items: List[Dict]) -> List[Dict]:
+    def parse_items(self, items: List[Dict]) -> List[Listing]:
         listings = []
-        for item in items:
-            if item.get("rentBuy") != "Huur":
-                continue
-            # Skip non-residential objects (e.g. "voorVoertuig" garages/parking).
-            categorie = (item.get("dwellingType") or {}).get("categorie", "")
-            if categorie and categorie != "woning":
-                continue
+        rows, rents = self._filter_rows(items)
+        for row, price_value in zip(rows, rents):
+            item = items[row]
             city = (item.get("city") or {}).get("name", "")
-            municipality = (item.get("municipality") or {}).get("name", "")
             gemeente = item.get("gemeenteGeoLocatieNaam", "")
-            if self.locations and not self._location_allowed(city, municipality, gemeente):
-                continue
             total_rent = item.get("totalRent")
-            if (
-                self.max_price is not None
-                and total_rent is not None
-                and float(total_rent) > self.max_price
-            ):
-                continue
             street = item.get("street", "") or ""
             house_number = item.get("houseNumber", "")
             addition = item.get("houseNumberAddition") or ""
@@ -418,21 +529,57 @@ class Zig365Scraper(BaseScraper):
             url = f"{self.site_base_url}{self.detail_path}{url_key}" if url_key else ""
             price = f"€ {total_rent}" if total_rent is not None else "Prijs onbekend"
             listings.append(
-                {
-                    "id": self.generate_listing_id(url),
-                    "title": full_street,
-                    "url": url,
-                    "price": price,
-                    "address": f"{full_street}, {town}",
-                    "source": self.source,
-                    "timestamp": datetime.now().isoformat(),
-                }
+                Listing(
+                    id=self.generate_listing_id(url),
+                    title=full_street,
+                    url=url,
+                    price=price,
+                    address=f"{full_street}, {town}",
+                    source=self.source,
+                    timestamp=self.run_timestamp,
+                    price_value=price_value,
+                )
             )
         return listings
 
-    def _location_allowed(self, city: str, municipality: str, gemeente: str) -> bool:
-        targets = {loc.strip().lower() for loc in self.locations}
+    def _filter_rows(self, items: List[Dict]) -> Tuple[List[int], List[Optional[float]]]:
+        """Indices of residential rentals in the target towns under max_price.
+
+        Works column by column instead of item by item: each predicate runs
+        over the rows that survived the previous one, cheapest first, so the
+        town check (the costliest) only sees what is left. Returns the kept
+        row indices with their rent (None when unknown).
+        """
+        # Skip sales and non-residential objects (e.g. "voorVoertuig" garages/parking).
+        rows = [
+            row
+            for row, item in enumerate(items)
+            if item.get("rentBuy") == "Huur"
+            and ((item.get("dwellingType") or {}).get("categorie") or "") in ("", "woning")
+        ]
+        # parse_price returns None instead of raising on a malformed rent, so
+        # one bad item (possibly from a town we'd drop anyway) can't fail the page.
+        rents = [parse_price(items[row].get("totalRent")) for row in rows]
+        if self.max_price is not None:
+            # Listings with an unknown rent are kept.
+            keep = [rent is None or rent <= self.max_price for rent in rents]
+            rows = [row for row, kept in zip(rows, keep) if kept]
+            rents = [rent for rent, kept in zip(rents, keep) if kept]
+        if self.locations:
+            # Built once per page rather than once per item.
+            targets = expand_towns(self.locations, self.radius_km)
+            keep = [self._in_targets(items[row], targets) for row in rows]
+            rows = [row for row, kept in zip(rows, keep) if kept]
+            rents = [rent for rent, kept in zip(rents, keep) if kept]
+        return rows, rents
+
+    @staticmethod
+    def _in_targets(item: Dict, targets: FrozenSet[str]) -> bool:
         return any(
             name and name.strip().lower() in targets
-            for name in (city, municipality, gemeente)
+            for name in (
+                (item.get("city") or {}).get("name"),
+                (item.get("municipality") or {}).get("name"),
+                item.get("gemeenteGeoLocatieNaam"),
+            )
         )
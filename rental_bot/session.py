@@ -0,0 +1,127 @@
+"""Browser session state (cookies, Cloudflare clearance) kept between runs.
+
+Every run used to start with empty cookie jars, so Cloudflare challenged each
+request from scratch. `SessionStore` keeps one curl_cffi session per host and
+impersonation profile, saves its cookies to a JSON state file after the run and
+restores the unexpired ones at the next start. Profiles that recently got
+through for a host are tried first.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from curl_cffi import requests as cffi_requests
+
+from .config import logger
+
+
+class SessionStore:
+    # Cookies without an expiry (browser-session cookies) are kept this long.
+    SESSION_COOKIE_MAX_AGE = 12 * 3600
+
+    def __init__(self, state_file: str = "session_state.json"):
+        self.state_file = state_file
+        # "host|profile" -> {"cookies": [...], "last_success": epoch seconds}
+        self.state: Dict[str, Dict] = {}
+        self._sessions: Dict[str, cffi_requests.Session] = {}
+        self.load_state()
+
+    def __getstate__(self) -> Dict:
+        # Scrapers are pickled to parse workers; live sessions stay behind.
+        state = self.__dict__.copy()
+        state["_sessions"] = {}
+        return state
+
+    def load_state(self) -> None:
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r") as f:
+                self.state = json.load(f)
+            logger.info(f"Loaded session state for {len(self.state)} host profiles")
+        except Exception as exc:  # pragma: no cover - file errors
+            logger.error(f"Error loading session state: {exc}")
+
+    def save_state(self) -> None:
+        for key, entry in self.state.items():
+            if key in self._sessions:
+                self._capture(key, self._sessions[key])
+            else:
+                entry["cookies"] = self._live_cookies(key)
+        try:
+            with open(self.state_file, "w") as f:
+                json.dump(self.state, f)
+        except Exception as exc:  # pragma: no cover - file errors
+            logger.error(f"Error saving session state: {exc}")
+
+    @staticmethod
+    def _key(url: str, profile: str) -> str:
+        return f"{urlparse(url).netloc}|{profile}"
+
+    def _live_cookies(self, key: str) -> List[Dict]:
+        now = time.time()
+        return [
+            cookie
+            for cookie in self.state.get(key, {}).get("cookies", [])
+            if cookie["expires"] > now
+        ]
+
+    def _capture(self, key: str, session: cffi_requests.Session) -> None:
+        now = time.time()
+        # Restored cookies come back without an expiry; keep the stored one so
+        # reuse does not extend their lifetime.
+        known = {
+            (cookie["name"], cookie["domain"], cookie["path"]): cookie["expires"]
+            for cookie in self.state.get(key, {}).get("cookies", [])
+        }
+        cookies = []
+        for cookie in session.cookies.jar:
+            expires = cookie.expires or known.get(
+                (cookie.name, cookie.domain, cookie.path), now + self.SESSION_COOKIE_MAX_AGE
+            )
+            if expires > now:
+                cookies.append(
+                    {
+                        "name": cookie.name,
+                        "value": cookie.value,
+                        "domain": cookie.domain,
+                        "path": cookie.path,
+                        "secure": cookie.secure,
+                        "expires": expires,
+                    }
+                )
+        self.state.setdefault(key, {})["cookies"] = cookies
+
+    def session(self, url: str, profile: str) -> cffi_requests.Session:
+        """The session for this host/profile, created with restored cookies."""
+        key = self._key(url, profile)
+        if key not in self._sessions:
+            session = cffi_requests.Session(impersonate=profile)
+            for cookie in self._live_cookies(key):
+                session.cookies.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie["domain"],
+                    path=cookie["path"],
+                    secure=cookie["secure"],
+                )
+            self._sessions[key] = session
+        return self._sessions[key]
+
+    def record(self, url: str, profile: str, ok: bool) -> None:
+        """Note the outcome of a request made through `session`."""
+        key = self._key(url, profile)
+        if key in self._sessions:
+            self._capture(key, self._sessions[key])
+        if ok:
+            self.state.setdefault(key, {})["last_success"] = time.time()
+
+    def preferred_profiles(self, url: str, profiles: List[str]) -> List[str]:
+        """`profiles` with the ones that last got through for this host first."""
+        def last_success(profile: str) -> Tuple[float, int]:
+            entry: Optional[Dict] = self.state.get(self._key(url, profile))
+            return (-(entry or {}).get("last_success", 0.0), profiles.index(profile))
+
+        return sorted(profiles, key=last_success)
@@ -1,35 +1,177 @@
-"""Persistence for seen listings."""
+"""Persistence for seen listings.
+
+The storage file maps each seen listing ID to
+``[fingerprint, last_seen, offline_since]``: a short content fingerprint (see
+`listing.listing_fingerprint`), the number of the last run that saw the
+listing, and the run in which it was seen to go offline (or null). A run's
+number is one more than the highest stored ``last_seen``, so runs that save
+nothing do not count.
+
+A listing only goes offline when a successful fetch of the first results page
+it was on no longer shows it although a listing that was below it still does
+(see `vanished`). A source that is down or skipped, or a listing that merely
+slid to page 2, therefore never marks anything offline. A listing that returns
+at least ``relist_after`` runs after going offline is RELISTED.
+
+Older files holding a plain list of IDs, a bare fingerprint or a
+``[fingerprint, last_seen]`` pair per ID still load; those IDs get the missing
+fields the next time they are seen.
+"""
 import json
 import os
-from typing import Dict, List, Set
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
 
 from .config import logger
+from .listing import listing_fingerprint
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+RELISTED = "relisted"
+
+
+def vanished(previous: List[str], current: List[str]) -> List[str]:
+    """IDs from the `previous` first page that were taken offline by `current`.
+
+    Both are first-page IDs in newest-first order. An ID missing from
+    `current` only counts if some ID that was below it is still there: then it
+    can't have been pushed to page 2 by newer listings.
+    """
+    present = set(current)
+    gone = []
+    below_present = False
+    for listing_id in reversed(previous):
+        if listing_id in present:
+            below_present = True
+        elif below_present:
+            gone.append(listing_id)
+    return gone
 
 
 class ListingStorage:
-    def __init__(self, storage_file: str = "seen_listings.json"):
+    def __init__(self, storage_file: str = "seen_listings.json", relist_after: int = 48):
         self.storage_file = storage_file
+        # A listing that comes back this many runs after going offline counts
+        # as relisted.
+        self.relist_after = relist_after
         self.seen_listings: Set[str] = set()
+        self.fingerprints: Dict[str, str] = {}
+        self.last_seen: Dict[str, int] = {}
+        self.offline_since: Dict[str, int] = {}
+        self.run = 1
+        # IDs fingerprinted by this process since loading; on save these win
+        # over whatever a concurrent run wrote for the same ID.
+        self._updated: Set[str] = set()
         self.load_seen_listings()
 
+    def _read_file(self) -> Tuple[Set[str], Dict[str, str], Dict[str, int], Dict[str, int]]:
+        with open(self.storage_file, "r") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            return set(data), {}, {}, {}
+        fingerprints: Dict[str, str] = {}
+        last_seen: Dict[str, int] = {}
+        offline_since: Dict[str, int] = {}
+        for listing_id, value in data.items():
+            fingerprint: Optional[str] = value
+            if isinstance(value, list):
+                fingerprint, run, offline = (value + [None, None])[:3]
+                if run is not None:
+                    last_seen[listing_id] = run
+                if offline is not None:
+                    offline_since[listing_id] = offline
+            if fingerprint:
+                fingerprints[listing_id] = fingerprint
+        return set(data), fingerprints, last_seen, offline_since
+
     def load_seen_listings(self) -> None:
         if os.path.exists(self.storage_file):
             try:
-                with open(self.storage_file, "r") as f:
-                    self.seen_listings = set(json.load(f))
+                self.seen_listings, self.fingerprints, self.last_seen, self.offline_since = self._read_file()
+                self.run = max(self.last_seen.values(), default=0) + 1
                 logger.info(f"Loaded {len(self.seen_listings)} previously seen listings")
             except Exception as exc:  # pragma: no cover - file errors
                 logger.error(f"Error loading seen listings: {exc}")
         else:
             logger.info("No existing storage file found, starting fresh")
 
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Advisory lock held only for the read-merge-write in `save_seen_listings`.
+
+        Overlapping cron runs (or several workers) each fetch in parallel and
+        only serialise here, for the few milliseconds a save takes.
+        """
+        if fcntl is None:  # pragma: no cover - non-POSIX platforms
+            yield
+            return
+        with open(f"{self.storage_file}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
     def save_seen_listings(self) -> None:
+        """Merge with the file on disk and replace it atomically.
+
+        IDs written by a concurrent run since we loaded are kept (union), so
+        nothing it saw gets notified again on the next run.
+        """
+        with self._locked():
+            if os.path.exists(self.storage_file):
+                try:
+                    seen, fingerprints, last_seen, offline_since = self._read_file()
+                    self.seen_listings.update(seen)
+                    for listing_id in seen - self._updated:
+                        for ours, theirs in (
+                            (self.fingerprints, fingerprints),
+                            (self.last_seen, last_seen),
+                            (self.offline_since, offline_since),
+                        ):
+                            if listing_id in theirs:
+                                ours[listing_id] = theirs[listing_id]
+                            else:
+                                ours.pop(listing_id, None)
+                except Exception as exc:  # pragma: no cover - file errors
+                    logger.error(f"Error merging seen listings: {exc}")
+            self._write_seen_listings()
+
+    def _write_seen_listings(self) -> None:
+        # Write to a temp file in the same directory and rename over the
+        # original, so readers never see a truncated or half-written file.
+        directory = os.path.dirname(os.path.abspath(self.storage_file))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(self.storage_file)}.", suffix=".tmp"
+        )
         try:
-            with open(self.storage_file, "w") as f:
-                json.dump(list(self.seen_listings), f)
+            with os.fdopen(fd, "w") as f:
+                json.dump(
+                    {
+                        listing_id: [
+                            self.fingerprints.get(listing_id, ""),
+                            self.last_seen.get(listing_id),
+                            self.offline_since.get(listing_id),
+                        ]
+                        for listing_id in self.seen_listings
+                    },
+                    f,
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.storage_file)
             logger.info(f"Saved {len(self.seen_listings)} listings to storage")
         except Exception as exc:  # pragma: no cover - file errors
             logger.error(f"Error saving seen listings: {exc}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
     def is_new_listing(self, listing_id: str) -> bool:
         return listing_id not in self.seen_listings
@@ -37,7 +179,64 @@ class ListingStorage:
     def mark_as_seen(self, listing_id: str) -> None:
         self.seen_listings.add(listing_id)
 
+    def classify(self, listing: Dict) -> str:
+        """Return NEW, RELISTED, CHANGED (price/title/details differ) or UNCHANGED."""
+        listing_id = listing["id"]
+        if listing_id not in self.seen_listings:
+            return NEW
+        offline_since = self.offline_since.get(listing_id)
+        if offline_since is not None and self.run - offline_since >= self.relist_after:
+            return RELISTED
+        stored = self.fingerprints.get(listing_id)
+        if stored and stored != listing_fingerprint(listing):
+            return CHANGED
+        return UNCHANGED
+
+    def mark_offline(self, listing_ids: List[str]) -> None:
+        """Record that `listing_ids` went offline in this run (see `vanished`)."""
+        for listing_id in listing_ids:
+            if listing_id in self.seen_listings and listing_id not in self.offline_since:
+                self.offline_since[listing_id] = self.run
+                self._updated.add(listing_id)
+
     def update_with_listings(self, listings: List[Dict]) -> None:
         for listing in listings:
             self.mark_as_seen(listing["id"])
+            self.fingerprints[listing["id"]] = listing_fingerprint(listing)
+            self.last_seen[listing["id"]] = self.run
+            self.offline_since.pop(listing["id"], None)
+            self._updated.add(listing["id"])
         self.save_seen_listings()
+
+
+def merge_storage_files(ours: str, theirs: str) -> None:
+    """Union-merge the storage file `ours` into `theirs`, in place.
+
+    For runs that cannot share a lock, e.g. GitHub Actions runners that each
+    commit their copy: after pulling the other run's file, the copy saved
+    before the pull is merged into it. Per ID the entry with the higher
+    ``last_seen`` wins; on a tie `ours` keeps its fingerprint and an offline
+    mark from either side is kept.
+    """
+    merged = ListingStorage(theirs)
+    other = ListingStorage(ours)
+    for listing_id in other.seen_listings:
+        other_run = other.last_seen.get(listing_id, -1)
+        merged_run = merged.last_seen.get(listing_id, -1)
+        if listing_id in merged.seen_listings:
+            if other_run < merged_run:
+                continue
+            if other_run == merged_run and listing_id in merged.offline_since:
+                other.offline_since.setdefault(listing_id, merged.offline_since[listing_id])
+        merged.seen_listings.add(listing_id)
+        for target, source in (
+            (merged.fingerprints, other.fingerprints),
+            (merged.last_seen, other.last_seen),
+            (merged.offline_since, other.offline_since),
+        ):
+            if listing_id in source:
+                target[listing_id] = source[listing_id]
+            else:
+                target.pop(listing_id, None)
+    with merged._locked():
+        merged._write_seen_listings()
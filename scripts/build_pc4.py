@@ -0,0 +1,108 @@
+"""Rebuild rental_bot/data/pc4.csv as a national extract from PDOK.
+
+The PDOK Locatieserver serves the BAG (Basisregistratie Adressen en Gebouwen)
+as open data, including one "postcode" document per 6-character postcode with
+its woonplaats, gemeente and WGS84 centroid. For every 4-digit postcode this
+script fetches up to 100 of those documents and writes one row:
+
+    pc4,town,municipality,lat,lon
+
+where town and municipality are the most common woonplaats/gemeente among the
+PC6 postcodes and lat/lon is the mean of their centroids. Postcodes without any
+document are skipped.
+
+    python scripts/build_pc4.py [--out rental_bot/data/pc4.csv] [--delay 0.05]
+
+It makes one request per 4-digit postcode (about 9000), so a full run takes a
+while; --first/--last limit the range, e.g. to refresh one region.
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+SEARCH_URL = "https://api.pdok.nl/bzk/locatieserver/search/v3_1/free"
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rental_bot", "data", "pc4.csv")
+
+_POINT_RE = re.compile(r"POINT\(\s*(-?[\d.]+)\s+(-?[\d.]+)\s*\)")
+
+
+def fetch_postcodes(session: requests.Session, pc4: int) -> List[Dict]:
+    """PC6 "postcode" documents of one 4-digit postcode."""
+    response = session.get(
+        SEARCH_URL,
+        params={
+            "q": "*:*",
+            "fq": ["type:postcode", f"postcode:{pc4}*"],
+            "fl": "postcode,woonplaatsnaam,gemeentenaam,centroide_ll",
+            "rows": 100,
+        },
+        timeout=30,
+    )
+    response.raise_for_status()
+    return response.json()["response"]["docs"]
+
+
+def pc4_row(pc4: int, docs: Iterable[Dict]) -> Optional[Tuple[int, str, str, float, float]]:
+    """One pc4.csv row from the PC6 documents of `pc4`, or None without data."""
+    towns: Counter = Counter()
+    municipalities: Counter = Counter()
+    lats: List[float] = []
+    lons: List[float] = []
+    for doc in docs:
+        match = _POINT_RE.match(doc.get("centroide_ll") or "")
+        if not match or not doc.get("woonplaatsnaam"):
+            continue
+        # WKT points are "POINT(lon lat)".
+        lons.append(float(match.group(1)))
+        lats.append(float(match.group(2)))
+        towns[doc["woonplaatsnaam"]] += 1
+        municipalities[doc.get("gemeentenaam") or doc["woonplaatsnaam"]] += 1
+    if not lats:
+        return None
+    return (
+        pc4,
+        towns.most_common(1)[0][0],
+        municipalities.most_common(1)[0][0],
+        round(sum(lats) / len(lats), 4),
+        round(sum(lons) / len(lons), 4),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--first", type=int, default=1000)
+    parser.add_argument("--last", type=int, default=9999)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds between requests")
+    args = parser.parse_args(argv)
+
+    rows = []
+    with requests.Session() as session:
+        for pc4 in range(args.first, args.last + 1):
+            row = pc4_row(pc4, fetch_postcodes(session, pc4))
+            if row:
+                rows.append(row)
+            if pc4 % 100 == 0:
+                print(f"{pc4}: {len(rows)} postcodes", file=sys.stderr)
+            time.sleep(args.delay)
+
+    # Write next to the target and swap it in, so an interrupted run leaves
+    # the old table intact.
+    tmp = args.out + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["pc4", "town", "municipality", "lat", "lon"])
+        writer.writerows(rows)
+    os.replace(tmp, args.out)
+    print(f"wrote {len(rows)} postcodes to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Merge this run's bot state into the files just pulled from the repository.
+
+    python scripts/merge_state.py SAVED_DIR
+
+GitHub Actions runs are separate machines, so the file lock in
+`ListingStorage` never sees another run. The workflow copies
+seen_listings.json and source_stats.json to SAVED_DIR, resets the checkout to
+the latest pushed commit and then runs this script, which union-merges the
+saved copies into the checked-out files instead of leaving git to conflict.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rental_bot.scheduling import merge_stats_files  # noqa: E402
+from rental_bot.storage import merge_storage_files  # noqa: E402
+
+STATE_FILES = (
+    ("seen_listings.json", merge_storage_files),
+    ("source_stats.json", merge_stats_files),
+)
+
+
+def main(saved_dir: str) -> None:
+    for name, merge in STATE_FILES:
+        saved = os.path.join(saved_dir, name)
+        if os.path.exists(saved):
+            merge(saved, name)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        raise SystemExit(__doc__)
+    main(sys.argv[1])
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.listing import Listing
+
+
+@pytest.fixture
+def make_listing():
+    """Factory for a sample `Listing`; keyword arguments override its fields."""
+
+    def make(listing_id="abc", **overrides):
+        fields = dict(
+            id=listing_id,
+            title="Kerkstraat 23C",
+            url=f"https://example.com/{listing_id}",
+            price="€ 900",
+            address="Kerkstraat 23C, Veessen",
+            source="Test",
+            timestamp="2024-01-01T00:00:00",
+        )
+        fields.update(overrides)
+        return Listing(**fields)
+
+    return make
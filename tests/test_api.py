@@ -0,0 +1,84 @@
+import gzip
+import json
+import os
+import sys
+import threading
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.api import FeedTailer, ListingIndex, make_server
+from rental_bot.feed import ListingFeed
+
+
+def test_index_since_cursor_and_filters(make_listing):
+    index = ListingIndex()
+    index.upsert(make_listing("a").to_dict())
+    index.upsert(
+        make_listing("b", address="Dorpsstraat 1, Epe", source="Pararius", price_value=1400.0).to_dict()
+    )
+    cursor, listings = index.query()
+    assert cursor == 2 and [l["id"] for l in listings] == ["a", "b"]
+
+    # An update moves "a" past the client's cursor; "b" is not sent again.
+    index.upsert(make_listing("a", price_value=850.0).to_dict())
+    cursor, listings = index.query(since=cursor)
+    assert cursor == 3 and [(l["id"], l["price_value"]) for l in listings] == [("a", 850.0)]
+
+    assert [l["id"] for l in index.query(town="Epe")[1]] == ["b"]
+    assert [l["id"] for l in index.query(source="pararius")[1]] == ["b"]
+    assert [l["id"] for l in index.query(max_price=1000)[1]] == ["a"]
+    cursor, listings = index.query(limit=1)
+    assert cursor == 2 and len(listings) == 1
+
+
+def test_http_api_tails_feed(tmp_path, make_listing):
+    path = str(tmp_path / "feed.ndjson")
+    feed = ListingFeed(path, max_bytes=1)
+    feed.write(make_listing("a").to_dict())
+    feed.close()
+    index = ListingIndex()
+    tailer = FeedTailer(path, index)
+    tailer.load_history()
+
+    server = make_server(index, tailer, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        first = json.load(urlopen(f"{base}/listings"))
+        assert [l["id"] for l in first["listings"]] == ["a"]
+
+        # A later run rotates the feed (max_bytes=1) and appends "b".
+        feed = ListingFeed(path, max_bytes=1)
+        feed.write(make_listing("b").to_dict())
+        feed.close()
+        second = json.load(urlopen(f"{base}/listings?since={first['cursor']}"))
+        assert [l["id"] for l in second["listings"]] == ["b"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_load_history_replays_only_rotated_segments_in_order(tmp_path):
+    path = str(tmp_path / "feed.ndjson")
+
+    def segment(name, listing_id, compress=False):
+        opener = gzip.open if compress else open
+        with opener(path + name, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"id": listing_id}) + "\n")
+
+    segment(".20240101T000000Z.gz", "a", compress=True)
+    segment(".20240101T000000Z-1.gz", "b", compress=True)
+    segment(".20240101T000000Z-10.gz", "d", compress=True)
+    segment(".20240101T000000Z-2", "c")
+    # Half-written gzip copy of the segment above; the plain copy wins.
+    with open(path + ".20240101T000000Z-2.gz", "wb") as f:
+        f.write(b"\x1f\x8b")
+    (tmp_path / "feed.ndjson.lock").write_text("")
+    (tmp_path / "feed.ndjson.bak").write_text("not json\n")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "e"}) + "\n")
+
+    index = ListingIndex()
+    FeedTailer(path, index).load_history()
+    assert [l["id"] for l in index.query()[1]] == ["a", "b", "c", "d", "e"]
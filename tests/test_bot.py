@@ -0,0 +1,166 @@
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.bot import MultiRentalBot
+from rental_bot.coordination import LeaseTable
+from rental_bot.scheduling import SourceStats
+from rental_bot.scrapers import ParariusScraper, Zig365Scraper
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+PARARIUS_HTML = (DATA_DIR / "pararius_sample.html").read_text()
+ZIG365_JSON = (DATA_DIR / "zig365_sample.json").read_text()
+
+
+class OfflinePararius(ParariusScraper):
+    def fetch_page(self, url=None) -> str:
+        return PARARIUS_HTML
+
+
+class OfflineZig365(Zig365Scraper):
+    def fetch_page(self, url=None) -> str:
+        return ZIG365_JSON
+
+
+def _scrapers():
+    return [
+        OfflinePararius("http://example.com", source="Pararius"),
+        OfflineZig365(api_host="x", site_base_url="https://example.com", source="Zig"),
+    ]
+
+
+def test_pipelined_collect_matches_inline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    inline = MultiRentalBot(_scrapers(), parse_workers=1).collect_listings()
+    pooled = MultiRentalBot(_scrapers(), parse_workers=2).collect_listings()
+    # Batches stream out as each parse finishes, so only the contents must match.
+    assert sorted(l["id"] for l in pooled) == sorted(l["id"] for l in inline)
+    assert {l["source"] for l in pooled} == {"Pararius", "Zig"}
+
+
+def _results_page(slugs):
+    items = "".join(
+        f'<section class="listing-search-item__content">'
+        f'<h2 class="listing-search-item__title"><a href="/apartment-for-rent/apeldoorn/{slug}">{slug}</a></h2>'
+        f"</section>"
+        for slug in slugs
+    )
+    return f"<html><body>{items}</body></html>"
+
+
+class PagedPararius(ParariusScraper):
+    PAGES = {1: ["a", "b"], 2: ["c"], 3: ["d"]}
+
+    def fetch_page(self, url=None) -> str:
+        self.fetched.append(url)
+        page = int(url.rsplit("page-", 1)[1]) if "page-" in url else 1
+        return _results_page(self.PAGES[page])
+
+
+def _paged_bot(max_pages):
+    scraper = PagedPararius("http://example.com/apeldoorn", source="Pararius", max_pages=max_pages)
+    scraper.fetched = []
+    return MultiRentalBot([scraper], parse_workers=1), scraper
+
+
+def test_crawl_walks_pages_until_only_seen_listings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot, scraper = _paged_bot(max_pages=3)
+    assert len(bot.collect_listings()) == 4
+    assert scraper.fetched[-1] == "http://example.com/apeldoorn/page-3"
+
+    bot, scraper = _paged_bot(max_pages=3)
+    known = [f"https://www.pararius.com/apartment-for-rent/apeldoorn/{slug}" for slug in ("a", "b")]
+    bot.storage.update_with_listings([{"id": scraper.generate_listing_id(url)} for url in known])
+    # Page 1 holds only known listings, so the usual case is one request.
+    assert len(bot.collect_listings()) == 2
+    assert len(scraper.fetched) == 1
+
+
+# Set by the test's notifier once Zig is notified; module level so the scraper
+# still pickles for the parse pool.
+_EVENTS: List[str] = []
+_ZIG_NOTIFIED = threading.Event()
+
+
+class TrackedPararius(OfflinePararius):
+    def fetch_page(self, url=None) -> str:
+        _EVENTS.append("fetch Pararius")
+        # A slow fetch: it only returns once Zig's notification went out (or
+        # gives up after a few seconds), so Zig must not wait for it.
+        _ZIG_NOTIFIED.wait(timeout=5)
+        _EVENTS.append("fetched Pararius")
+        return super().fetch_page(url)
+
+
+@pytest.mark.parametrize("parse_workers", [1, 2])
+def test_notifies_each_source_before_fetching_the_next(tmp_path, monkeypatch, parse_workers):
+    monkeypatch.chdir(tmp_path)
+    _EVENTS.clear()
+    _ZIG_NOTIFIED.clear()
+
+    def notify(message):
+        _EVENTS.append(message[:20])
+        if message.startswith("NEW LISTING FOUND [Z"):
+            _ZIG_NOTIFIED.set()
+
+    zig = OfflineZig365(api_host="x", site_base_url="https://example.com", source="Zig")
+    bot = MultiRentalBot([zig, TrackedPararius("http://example.com", source="Pararius")], parse_workers=parse_workers)
+    bot.enricher = None
+    monkeypatch.setattr(bot.notifier, "send_telegram_message", notify)
+    bot.check_for_new_listings()
+    notified = _EVENTS.index("NEW LISTING FOUND [Z")
+    assert _EVENTS.index("fetched Pararius") > notified
+    if parse_workers == 1:
+        assert _EVENTS.index("fetch Pararius") > notified
+    # Each batch is written to storage as it is handled.
+    assert bot.storage.is_new_listing(zig.parse_page(ZIG365_JSON)[0].id) is False
+
+
+def test_all_town_searches_of_a_source_go_to_one_worker(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = str(tmp_path / "leases.db")
+
+    def worker(worker_id):
+        scrapers = [
+            OfflinePararius("http://example.com/epe", source="Pararius"),
+            OfflineZig365(api_host="x", site_base_url="https://example.com", source="Zig"),
+            OfflinePararius("http://example.com/emst", source="Pararius"),
+        ]
+        return MultiRentalBot(scrapers, parse_workers=1, leases=LeaseTable(db, worker_id))
+
+    runs = {}
+    for tick in range(2):
+        for worker_id in ("w1", "w2", "w3"):
+            bot = worker(worker_id)
+            runs[worker_id] = [scraper.search_url for scraper in bot._active_scrapers()]
+            bot.leases.close()
+    # Second tick: every worker sees the others, so each site has one owner.
+    pararius = [urls for urls in runs.values() if "http://example.com/epe" in urls]
+    assert len(pararius) == 1
+    assert "http://example.com/emst" in pararius[0]
+    assert sorted(url for urls in runs.values() for url in urls) == sorted(
+        ["http://example.com/epe", "http://example.com/emst", _scrapers()[1].search_url]
+    )
+
+
+def test_listing_gone_from_first_page_and_back_is_relisted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sent = []
+    for page_one in (["a", "b", "c"], ["a", "c"], ["b", "a", "c"]):
+        scraper = PagedPararius("http://example.com/apeldoorn", source="Pararius")
+        scraper.PAGES = {1: page_one}
+        scraper.fetched = []
+        bot = MultiRentalBot([scraper], parse_workers=1, stats=SourceStats(str(tmp_path / "stats.json")))
+        bot.enricher = None
+        bot.storage.relist_after = 1
+        monkeypatch.setattr(bot.notifier, "send_telegram_message", sent.append)
+        bot.check_for_new_listings()
+    assert [message.split(":")[0] for message in sent] == ["NEW LISTING FOUND [Pararius]"] * 3 + [
+        "LISTING BACK ONLINE [Pararius]"
+    ]
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.coordination import LeaseTable
+
+KEYS = ["a", "b", "c", "d", "e", "f"]
+
+
+def _run(db, worker_id, keys=KEYS, **kwargs):
+    leases = LeaseTable(db, worker_id, **kwargs)
+    claimed = leases.claim(keys)
+    leases.close()
+    return claimed
+
+
+def test_workers_split_sources_regardless_of_start_order(tmp_path):
+    db = str(tmp_path / "leases.db")
+    # First tick: each worker announces itself.
+    _run(db, "w1")
+    _run(db, "w2")
+    splits = []
+    for order in (("w1", "w2"), ("w2", "w1")):
+        claimed = {worker_id: _run(db, worker_id) for worker_id in order}
+        splits.append(claimed)
+        assert claimed["w1"] and claimed["w2"]
+        assert sorted(claimed["w1"] + claimed["w2"]) == KEYS
+    assert splits[0] == splits[1]
+
+
+def test_sources_of_a_silent_worker_move_after_its_heartbeat_expires(tmp_path):
+    db = str(tmp_path / "leases.db")
+    _run(db, "w1", worker_ttl=0.2)
+    _run(db, "w2", worker_ttl=0.2)
+    assert _run(db, "w1", worker_ttl=0.2) != KEYS
+    time.sleep(0.3)
+    # w2 has not run since; w1 now owns everything.
+    assert _run(db, "w1", worker_ttl=0.2) == KEYS
+
+
+def test_owned_source_waits_for_the_previous_holder(tmp_path):
+    db = str(tmp_path / "leases.db")
+    first = LeaseTable(db, "w1")
+    assert first.claim(KEYS) == KEYS
+    # w2 joins while w1's run still holds every lease.
+    second = LeaseTable(db, "w2")
+    assert second.claim(KEYS) == []
+    assert first.renew("a")
+    first.close()
+    assert second.claim(KEYS) and second.claim(KEYS) != KEYS
+
+
+def test_consecutive_runs_each_claim_every_source(tmp_path):
+    db = str(tmp_path / "leases.db")
+    for run in range(3):
+        assert _run(db, "worker", ttl=600) == KEYS
+
+
+def test_leases_of_a_crashed_run_expire(tmp_path):
+    db = str(tmp_path / "leases.db")
+    LeaseTable(db, "w1", ttl=0.05).claim(KEYS)
+    # w1 stopped without closing; once the heartbeat and lease expire w2 takes over.
+    time.sleep(0.1)
+    assert LeaseTable(db, "w2", ttl=0.05, worker_ttl=0.05).claim(KEYS) == KEYS
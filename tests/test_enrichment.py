@@ -0,0 +1,80 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.enrichment import DetailEnricher, extract_details
+
+DETAIL_HTML = """
+<html><body>
+  <h1>Kerkstraat 23C, Veessen</h1>
+  <dl>
+    <dt>Woonoppervlakte</dt><dd>72 m²</dd>
+    <dt>Aantal kamers</dt><dd>3</dd>
+    <dt>Beschikbaar per</dt><dd>01-08-2024</dd>
+  </dl>
+</body></html>
+"""
+
+
+def test_extract_details():
+    assert extract_details(DETAIL_HTML) == {
+        "rooms": 3,
+        "area": 72,
+        "available_from": "01-08-2024",
+    }
+
+
+def test_enrich_uses_cache(tmp_path, monkeypatch, make_listing):
+    cache_file = str(tmp_path / "cache.json")
+    fetched = []
+
+    def fake_fetch(url):
+        fetched.append(url)
+        return DETAIL_HTML
+
+    enricher = DetailEnricher(cache_file)
+    monkeypatch.setattr(enricher, "fetch_detail", fake_fetch)
+    listings = [make_listing(url="https://a.example/1"), make_listing(url="https://b.example/2")]
+    enricher.enrich(listings)
+    assert sorted(fetched) == ["https://a.example/1", "https://b.example/2"]
+    assert listings[0].area == 72
+
+    # A fresh enricher reads the on-disk cache and makes no requests.
+    enricher = DetailEnricher(cache_file)
+    monkeypatch.setattr(enricher, "fetch_detail", fake_fetch)
+    listing = make_listing(url="https://a.example/1")
+    enricher.enrich([listing])
+    assert len(fetched) == 2
+    assert listing.rooms == 3
+
+
+def test_enrich_fetches_through_the_given_scraper_fetch(tmp_path, make_listing):
+    fetched = []
+
+    def scraper_fetch(url):
+        fetched.append(url)
+        return DETAIL_HTML
+
+    listing = make_listing(url="https://a.example/1")
+    DetailEnricher(str(tmp_path / "cache.json")).enrich([listing], fetch=scraper_fetch)
+    assert fetched == ["https://a.example/1"]
+    assert listing.available_from == "01-08-2024"
+
+
+def test_enrich_starts_no_fetch_after_the_deadline(tmp_path, make_listing):
+    from rental_bot.scheduling import Deadline
+
+    deadline = Deadline(60)
+    fetched = []
+
+    def slow_fetch(url):
+        fetched.append(url)
+        # The first fetch uses up the budget; the queued ones must not start.
+        deadline.expires_at = 0.0
+        return DETAIL_HTML
+
+    enricher = DetailEnricher(str(tmp_path / "cache.json"), workers_per_host=1, deadline=deadline)
+    listings = [make_listing(url=f"https://a.example/{i}") for i in range(5)]
+    enricher.enrich(listings, fetch=slow_fetch)
+    assert fetched == ["https://a.example/0"]
+    assert listings[0].area == 72 and listings[1].area is None
@@ -0,0 +1,52 @@
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.feed import ListingFeed
+
+
+def test_feed_appends_one_json_line_per_event(tmp_path, make_listing):
+    path = tmp_path / "feed.ndjson"
+    feed = ListingFeed(str(path))
+    feed.write(make_listing("a"))
+    feed.write({"id": "b", "title": "t"}, event="changed")
+    feed.close()
+    feed = ListingFeed(str(path))
+    feed.write(make_listing("c"))
+    feed.close()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["id"], r["event"]) for r in records] == [("a", "new"), ("b", "changed"), ("c", "new")]
+    assert records[0]["price_value"] == 900.0
+
+
+def test_feed_rotates_by_size_and_gzips(tmp_path, make_listing):
+    path = tmp_path / "feed.ndjson"
+    feed = ListingFeed(str(path), max_bytes=1, compress=True)
+    feed.write(make_listing("a"))
+    feed.write(make_listing("b"))
+    feed.close()
+    rotated = [p for p in tmp_path.iterdir() if p.name.endswith(".gz")]
+    assert len(rotated) == 1
+    with gzip.open(rotated[0], "rt") as f:
+        assert json.loads(f.readline())["id"] == "a"
+    assert json.loads(path.read_text())["id"] == "b"
+
+
+def test_writer_follows_rotation_by_another_run(tmp_path, make_listing):
+    path = tmp_path / "feed.ndjson"
+    first = ListingFeed(str(path), compress=True)
+    first.write(make_listing("a"))
+    first.flush()
+    # A second, overlapping run rotates the segment "first" still has open.
+    second = ListingFeed(str(path), max_bytes=1, compress=True)
+    second.write(make_listing("b"))
+    second.close()
+    first.write(make_listing("c"))
+    first.close()
+    rotated = [p for p in tmp_path.iterdir() if p.name.endswith(".gz")]
+    assert len(rotated) == 1
+    with gzip.open(rotated[0], "rt") as f:
+        assert [json.loads(line)["id"] for line in f] == ["a"]
+    assert [json.loads(line)["id"] for line in path.read_text().splitlines()] == ["b", "c"]
@@ -0,0 +1,31 @@
+import os
+import pickle
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.listing import parse_price
+
+
+def test_parse_price_formats():
+    assert parse_price("€ 1.250 per maand") == 1250.0
+    assert parse_price("€1,250 per month") == 1250.0
+    assert parse_price("€ 1.250,50") == 1250.5
+    assert parse_price("€ 514.65") == 514.65
+    assert parse_price("€ 950,-") == 950.0
+    assert parse_price("Prijs onbekend") is None
+    assert parse_price(None) is None
+
+
+def test_listing_dict_view(make_listing):
+    listing = make_listing(price="€ 1.250 per maand")
+    assert listing["id"] == listing.id == "abc"
+    assert listing.get("details") == ""
+    assert listing.get("missing", "x") == "x"
+    assert listing.price_value == 1250.0
+    assert listing.to_dict()["address"] == "Kerkstraat 23C, Veessen"
+    assert not hasattr(listing, "__dict__")
+
+
+def test_listing_pickles_for_worker_processes(make_listing):
+    listing = make_listing(details="3 kamers")
+    assert pickle.loads(pickle.dumps(listing)) == listing
@@ -2,7 +2,13 @@ import os
 import sys
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-from rental_bot.location import address_matches, address_matches_any
+from rental_bot.location import (
+    address_matches,
+    address_matches_any,
+    expand_towns,
+    postcode_index,
+    unknown_towns,
+)
 from rental_bot.scrapers import ParariusScraper
 
 TARGETS = ["Apeldoorn", "Epe", "Vaassen", "Heerde"]
@@ -18,6 +24,19 @@ def test_address_matches_by_postcode():
     assert address_matches("7339 CH Ugchelen", "Apeldoorn")
 
 
+def test_municipality_covers_its_villages():
+    assert address_matches("7371 AB Loenen", "Apeldoorn")
+    assert address_matches("7361 AA Beekbergen", "Apeldoorn")
+    assert address_matches("8171 AA Vaassen", "Epe")
+    assert address_matches("8191 AA Wapenveld", "Heerde")
+    assert address_matches("8194 AA Veessen", "Heerde")
+    # A village only covers its own postcodes.
+    assert not address_matches("8194 AA Veessen", "Wapenveld")
+    assert not address_matches("7311 JC Apeldoorn", "Vaassen")
+    # Without a postcode only the location's own name counts.
+    assert not address_matches("Dorpsstraat 1, Loenen", "Apeldoorn")
+
+
 def test_address_matches_word_boundary():
     # "Epe" must not match as a substring of another word.
     assert not address_matches("Eperweg 12, Heerde", "Epe")
@@ -28,6 +47,25 @@ def test_address_matches_any():
     assert address_matches_any("Dorpsstraat 3, Vaassen", TARGETS) is True
 
 
+def test_postcode_index_lookup():
+    index = postcode_index()
+    assert index.lookup(8194) == ("Veessen", "Heerde")
+    assert index.lookup(1011) is None
+
+
+def test_address_matches_within_radius():
+    # Twello is ~10 km from Apeldoorn; Zwolle is ~35 km away.
+    assert not address_matches("Dorpsstraat 1, Twello", "Apeldoorn")
+    assert address_matches("Dorpsstraat 1, Twello", "Apeldoorn", radius_km=15)
+    assert address_matches("7391 AB", "Apeldoorn", radius_km=15)
+    assert not address_matches("8014 VZ Zwolle", "Apeldoorn", radius_km=15)
+
+
+def test_expand_towns():
+    assert expand_towns(["Heerde"]) == {"heerde"}
+    assert {"wapenveld", "veessen"} <= expand_towns(["Heerde"], radius_km=5)
+
+
 def test_location_filter_drops_fallback_results():
     scraper = ParariusScraper("http://example.com", source="Pararius", locations=TARGETS)
     raw = [
@@ -39,3 +77,21 @@ def test_location_filter_drops_fallback_results():
     assert len(kept) == 2
     addresses = {l["address"] for l in kept}
     assert "8014 VZ Zwolle" not in addresses
+
+
+def test_unknown_towns_lists_locations_outside_the_table():
+    assert unknown_towns(["Apeldoorn", " veessen ", "Groningen"]) == ["Groningen"]
+
+
+def test_build_pc4_row_takes_majority_town_and_mean_centroid():
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts"))
+    from build_pc4 import pc4_row
+
+    docs = [
+        {"woonplaatsnaam": "Apeldoorn", "gemeentenaam": "Apeldoorn", "centroide_ll": "POINT(5.96 52.21)"},
+        {"woonplaatsnaam": "Apeldoorn", "gemeentenaam": "Apeldoorn", "centroide_ll": "POINT(5.98 52.23)"},
+        {"woonplaatsnaam": "Ugchelen", "gemeentenaam": "Apeldoorn", "centroide_ll": "POINT(5.94 52.18)"},
+        {"woonplaatsnaam": "Nergens", "centroide_ll": None},
+    ]
+    assert pc4_row(7339, docs) == (7339, "Apeldoorn", "Apeldoorn", 52.2067, 5.96)
+    assert pc4_row(1000, []) is None
@@ -38,3 +38,26 @@ def test_notify_new_listing_only_once(monkeypatch):
     notifier.notify_new_listing(listing)
     notifier.notify_new_listing(listing)
     assert len(sent) == 1
+
+
+def test_notify_changed_listing_once_per_version(monkeypatch):
+    sent = []
+    notifier = NotificationSystem("token", "1")
+    monkeypatch.setattr(notifier, "send_telegram_message", sent.append)
+    listing = {"id": "abc", "title": "t", "price": "€ 900", "address": "a", "url": "u", "source": "s"}
+    notifier.notify_changed_listing(listing)
+    notifier.notify_changed_listing(listing)
+    notifier.notify_changed_listing(dict(listing, price="€ 850"))
+    assert len(sent) == 2
+    assert sent[0].startswith("LISTING UPDATED [s]")
+
+
+def test_notify_relisted_listing_once(monkeypatch):
+    sent = []
+    notifier = NotificationSystem("token", "1")
+    monkeypatch.setattr(notifier, "send_telegram_message", sent.append)
+    listing = {"id": "abc", "title": "t", "price": "€ 900", "address": "a", "url": "u", "source": "s"}
+    notifier.notify_relisted_listing(listing)
+    notifier.notify_relisted_listing(listing)
+    assert len(sent) == 1
+    assert sent[0].startswith("LISTING BACK ONLINE [s]")
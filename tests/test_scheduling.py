@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.scheduling import Deadline, DeadlineExceeded, SourceStats, merge_stats_files
+from rental_bot.scrapers import ParariusScraper
+
+
+def test_stats_order_by_yield_and_latency(tmp_path):
+    stats_file = str(tmp_path / "stats.json")
+    stats = SourceStats(stats_file)
+    for _ in range(5):
+        stats.record_yield("slow", 1)
+        stats.record_latency("slow", 60)
+        stats.record_yield("fast", 1)
+        stats.record_latency("fast", 1)
+        stats.record_yield("empty", 0)
+        stats.record_latency("empty", 1)
+    stats.save_stats()
+    # Unknown sources are optimistic and go ahead of the known-empty one.
+    assert SourceStats(stats_file).order(["slow", "empty", "new", "fast"]) == [
+        "fast",
+        "new",
+        "empty",
+        "slow",
+    ]
+
+
+
+def test_merge_stats_files_keeps_latest_entry_per_source(tmp_path):
+    ours = SourceStats(str(tmp_path / "ours.json"))
+    theirs = SourceStats(str(tmp_path / "theirs.json"))
+    theirs.record_first_page("pararius", ["b", "a"])
+    theirs.record_first_page("zig365", ["z"])
+    ours.record_first_page("pararius", ["c", "b"])
+    ours.save_stats()
+    theirs.save_stats()
+
+    merge_stats_files(ours.stats_file, theirs.stats_file)
+    merged = SourceStats(theirs.stats_file)
+    assert merged.first_page("pararius") == ["c", "b"]
+    assert merged.first_page("zig365") == ["z"]
+
+def test_expired_deadline_cancels_fetch():
+    deadline = Deadline(0.001)
+    while not deadline.expired:
+        pass
+    scraper = ParariusScraper("http://example.invalid", source="Pararius")
+    scraper.deadline = deadline
+    with pytest.raises(DeadlineExceeded):
+        scraper.fetch_page()
+    assert scraper.fetch_raw() is None
+
+
+def test_no_deadline_is_unbounded():
+    deadline = Deadline(None)
+    assert not deadline.expired
+    assert deadline.timeout(30) == 30
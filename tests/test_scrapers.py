@@ -32,3 +32,12 @@ def test_wonen123_parse():
     listings = scraper.parse_listings(soup)
     assert len(listings) > 0
     assert listings[0]['url'].startswith('https://www.123wonen.nl')
+
+
+def test_paged_sources_default_to_newest_first():
+    # The early-stopping crawl relies on this for Pararius and Huurwoningen,
+    # whose search URLs carry no sort segment.
+    for html in (PARARIUS_HTML, HUURWONINGEN_HTML):
+        soup = BeautifulSoup(html, 'html.parser')
+        selected = soup.select_one('select[name="search-list-sorting"] option[selected]')
+        assert selected['value'] == 'published_at.desc'
@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+from rental_bot.session import SessionStore
+
+URL = "https://www.pararius.com/apartments/apeldoorn"
+
+
+def test_cookies_survive_between_runs(tmp_path):
+    state_file = str(tmp_path / "state.json")
+    store = SessionStore(state_file)
+    session = store.session(URL, "chrome131")
+    # Simulate the clearance cookie Cloudflare hands out.
+    session.cookies.set("cf_clearance", "token", domain=".pararius.com")
+    store.record(URL, "chrome131", ok=True)
+    store.save_state()
+
+    restored = SessionStore(state_file).session(URL, "chrome131")
+    assert restored.cookies.get("cf_clearance") == "token"
+
+
+def test_expired_cookies_are_dropped(tmp_path):
+    state_file = tmp_path / "state.json"
+    cookie = {"name": "cf_clearance", "value": "old", "domain": ".pararius.com", "path": "/", "secure": True}
+    state_file.write_text(
+        json.dumps({"www.pararius.com|chrome": {"cookies": [dict(cookie, expires=time.time() - 1)]}})
+    )
+    store = SessionStore(str(state_file))
+    assert store.session(URL, "chrome").cookies.get("cf_clearance") is None
+    store.save_state()
+    assert json.loads(state_file.read_text())["www.pararius.com|chrome"]["cookies"] == []
+
+
+def test_profiles_that_got_through_go_first(tmp_path):
+    store = SessionStore(str(tmp_path / "state.json"))
+    profiles = ["chrome", "chrome131", "chrome124"]
+    assert store.preferred_profiles(URL, profiles) == profiles
+    store.record(URL, "chrome124", ok=True)
+    assert store.preferred_profiles(URL, profiles) == ["chrome124", "chrome", "chrome131"]
+    # Other hosts keep the default order.
+    assert store.preferred_profiles("https://www.huurwoningen.nl/", profiles) == profiles
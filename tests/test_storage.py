@@ -1,9 +1,20 @@
+import json
 import os
 import sys
+import threading
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-from rental_bot.storage import ListingStorage
+from rental_bot.listing import listing_fingerprint
+from rental_bot.storage import (
+    CHANGED,
+    NEW,
+    RELISTED,
+    UNCHANGED,
+    ListingStorage,
+    merge_storage_files,
+    vanished,
+)
 
 
 def test_is_new_and_mark(tmp_path):
@@ -27,3 +38,114 @@ def test_update_with_listings_persist(tmp_path):
     storage2 = ListingStorage(str(storage_file))
     assert storage2.is_new_listing(listing["id"]) is False
     assert listing["id"] in storage_file.read_text()
+
+
+def test_classify_new_changed_unchanged(tmp_path):
+    storage_file = tmp_path / "listings.json"
+    storage = ListingStorage(str(storage_file))
+    listing = {"id": "a", "title": "Kerkstraat 1", "price": "€ 900", "details": ""}
+    assert storage.classify(listing) == NEW
+    storage.update_with_listings([listing])
+
+    storage = ListingStorage(str(storage_file))
+    assert storage.classify(listing) == UNCHANGED
+    assert storage.classify(dict(listing, price="€ 850")) == CHANGED
+
+
+def test_legacy_id_list_is_baseline(tmp_path):
+    storage_file = tmp_path / "listings.json"
+    storage_file.write_text('["a"]')
+    storage = ListingStorage(str(storage_file))
+    # IDs without a stored fingerprint are never reported as changed.
+    assert storage.classify({"id": "a", "title": "t", "price": "p"}) == UNCHANGED
+
+
+def test_save_merges_ids_from_concurrent_runs(tmp_path):
+    storage_file = tmp_path / "seen.json"
+    one = ListingStorage(str(storage_file))
+    two = ListingStorage(str(storage_file))
+    one.update_with_listings([{"id": "x", "price": "€ 900"}])
+    two.update_with_listings([{"id": "y"}])
+    assert set(json.loads(storage_file.read_text())) == {"x", "y"}
+    # The fingerprint "one" wrote for "x" survives the save by "two".
+    assert ListingStorage(str(storage_file)).classify({"id": "x", "price": "€ 850"}) == CHANGED
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+def test_parallel_saves_lose_no_ids(tmp_path):
+    storage_file = str(tmp_path / "seen.json")
+
+    def run(prefix):
+        storage = ListingStorage(storage_file)
+        for i in range(20):
+            storage.update_with_listings([{"id": f"{prefix}{i}"}])
+
+    threads = [threading.Thread(target=run, args=(prefix,)) for prefix in "abcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(ListingStorage(storage_file).seen_listings) == 80
+
+
+def test_merge_storage_files_keeps_both_runs(tmp_path):
+    # Two runners start from the same file and each commit their own copy.
+    base = {"old": ["f-old", 1, None], "both": ["f-both", 1, None]}
+    ours = tmp_path / "ours.json"
+    theirs = tmp_path / "theirs.json"
+    ours.write_text(json.dumps(dict(base, mine=["f-mine", 2, None], both=["f-ours", 2, None])))
+    theirs.write_text(json.dumps(dict(base, yours=["f-yours", 2, None], old=["f-old", 1, 2])))
+
+    merge_storage_files(str(ours), str(theirs))
+    merged = json.loads(theirs.read_text())
+    assert merged == {
+        "old": ["f-old", 1, 2],
+        "both": ["f-ours", 2, None],
+        "mine": ["f-mine", 2, None],
+        "yours": ["f-yours", 2, None],
+    }
+
+
+def test_vanished_ignores_listings_pushed_to_page_two():
+    previous = ["a", "b", "c", "d"]
+    # "b" is gone although "c" below it is still there; "d" just slid off.
+    assert vanished(previous, ["new", "a", "c"]) == ["b"]
+    assert vanished(previous, ["new1", "new2", "a", "b"]) == []
+
+
+def _next_run(storage_file, listings=(), offline=()):
+    storage = ListingStorage(storage_file, relist_after=2)
+    storage.mark_offline(list(offline))
+    storage.update_with_listings([{"id": listing_id} for listing_id in listings] or [{"id": "other"}])
+    return storage
+
+
+def test_listing_back_after_going_offline_is_relisted(tmp_path):
+    storage_file = str(tmp_path / "listings.json")
+    _next_run(storage_file, listings=["a", "b"])
+    _next_run(storage_file, listings=["b"], offline=["a"])
+    assert ListingStorage(storage_file, relist_after=2).classify({"id": "a"}) == UNCHANGED
+    _next_run(storage_file, listings=["b"])
+    assert ListingStorage(storage_file, relist_after=2).classify({"id": "a"}) == RELISTED
+    # Seeing it again clears the offline mark.
+    _next_run(storage_file, listings=["a"])
+    assert ListingStorage(storage_file, relist_after=2).classify({"id": "a"}) == UNCHANGED
+
+
+def test_source_outage_does_not_relist(tmp_path):
+    storage_file = str(tmp_path / "listings.json")
+    _next_run(storage_file, listings=["a"])
+    for run in range(5):
+        # Another source keeps saving while "a"'s source is down.
+        _next_run(storage_file, listings=[f"zig{run}"])
+    assert ListingStorage(storage_file, relist_after=2).classify({"id": "a"}) == UNCHANGED
+
+
+def test_fingerprint_only_file_still_loads(tmp_path):
+    storage_file = tmp_path / "listings.json"
+    fingerprinted = {"id": "a", "price": "€ 900"}
+    storage_file.write_text(json.dumps({"a": listing_fingerprint(fingerprinted)}))
+    storage = ListingStorage(str(storage_file), relist_after=0)
+    # No last-seen run stored yet, so never relisted.
+    assert storage.classify(fingerprinted) == UNCHANGED
+    assert storage.classify(dict(fingerprinted, price="€ 850")) == CHANGED
@@ -31,6 +31,7 @@ def test_zig365_keeps_only_residential_rentals_in_target_towns():
     assert listing["title"] == "Kerkstraat 23C"
     assert "Veessen" in listing["address"]
     assert listing["price"] == "€ 514.65"
+    assert listing.price_value == 514.65
 
 
 def test_zig365_builds_detail_url():
@@ -51,3 +52,30 @@ def test_zig365_without_location_filter_keeps_all_residential_rentals():
     listings = scraper.parse_items(SAMPLE)
     # Koop and garage are still dropped; Veessen, Zwolle and Vaassen rentals stay.
     assert len(listings) == 3
+
+
+def test_zig365_filter_keeps_item_order_and_unknown_rents():
+    veessen = next(item for item in SAMPLE if (item.get("city") or {}).get("name") == "Veessen")
+    unknown_rent = dict(veessen, totalRent=None, urlKey="unknown-rent")
+    too_expensive = dict(veessen, totalRent=1500.01, urlKey="too-expensive")
+    items = [unknown_rent] + SAMPLE + [too_expensive, dict(veessen, urlKey="last")]
+    listings = _scraper().parse_items(items)
+    assert [listing["url"].rsplit("/", 1)[-1] for listing in listings] == [
+        "unknown-rent",
+        "770-kerkstraat-23-c-veessen",
+        "last",
+    ]
+    assert listings[0]["price"] == "Prijs onbekend"
+    assert listings[0].price_value is None
+
+
+def test_zig365_malformed_rent_does_not_drop_the_page():
+    veessen = next(item for item in SAMPLE if (item.get("city") or {}).get("name") == "Veessen")
+    zwolle = next(item for item in SAMPLE if (item.get("city") or {}).get("name") == "Zwolle")
+    items = [dict(zwolle, totalRent="op aanvraag"), dict(veessen, totalRent="n.v.t.", urlKey="odd")] + SAMPLE
+    listings = _scraper().parse_page(json.dumps({"data": items}))
+    assert [listing["url"].rsplit("/", 1)[-1] for listing in listings] == [
+        "odd",
+        "770-kerkstraat-23-c-veessen",
+    ]
+    assert listings[0].price_value is None